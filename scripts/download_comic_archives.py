@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
 """
 Download comic archives from GoComics for multiple series.
-Usage: python3 scripts/download_comic_archives.py [count]
+Usage: python3 scripts/download_comic_archives.py [count] [--pretty] [--rate N]
 Default count is 30 comics per series.
 """
 
+import argparse
+import bisect
+import hashlib
 import sys
 import os
-import json
 import time
 import re
-import requests
+import tempfile
+import asyncio
+import aiohttp
+import orjson
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -34,36 +46,172 @@ COMICS = {
     }
 }
 
-def fetch_comic(slug: str, date: datetime) -> dict:
-    """Fetch a comic from GoComics for a specific date."""
+# All series share one session so fetches to gocomics.com / amuniversal.com
+# reuse keep-alive connections instead of paying a TLS handshake per request.
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+PAGE_HEADERS = {"Accept": "text/html,application/xhtml+xml"}
+
+PAGE_TIMEOUT = aiohttp.ClientTimeout(total=15)
+IMAGE_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# Comic asset URLs; amuniversal is preferred, featureassets is the fallback.
+# Matched on raw bytes so pages are never decoded as a whole.
+ASSET_URL_RE = re.compile(
+    rb'https://(?:assets\.amuniversal\.com/|featureassets\.gocomics\.com/assets/)[a-f0-9]+'
+)
+AMUNIVERSAL_PREFIX = b'https://assets.amuniversal.com/'
+
+
+def _compile_asset_db():
+    """Compile the asset URL prefixes into a Hyperscan database.
+    
+    Hyperscan only locates where URLs start; ASSET_URL_RE then takes the
+    full hex run from that offset.
+    """
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[
+            rb'https://assets\.amuniversal\.com/[a-f0-9]',
+            rb'https://featureassets\.gocomics\.com/assets/[a-f0-9]',
+        ],
+        ids=[0, 1],
+        elements=2,
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * 2,
+    )
+    return db
+
+
+ASSET_URL_DB = _compile_asset_db() if HYPERSCAN_AVAILABLE else None
+ASSET_URL_OVERLAP = 256  # bytes re-scanned across chunk boundaries
+
+# The image URL normally sits in the page <head>, so pages are streamed
+# and only read past this size when nothing better has been found yet
+PAGE_CHUNK_SIZE = 8192
+MAX_PAGE_BYTES = 131072
+
+MAX_CONCURRENCY = 8
+# Per-host request budget; high enough that MAX_CONCURRENCY workers aren't serialized
+REQUESTS_PER_SECOND = 8
+
+
+class RateLimiter:
+    """Async limiter that spaces requests at least 1/rate seconds apart."""
+    
+    def __init__(self, rate: float):
+        self.set_rate(rate)
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+    
+    def set_rate(self, rate: float):
+        self.interval = 1.0 / rate
+    
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Be nice to the servers: all series share one request budget per host
+PAGE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+IMAGE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+
+
+def iter_asset_urls(buf: bytearray, pos: int = 0) -> Iterator[re.Match]:
+    """Yield asset URL matches in buf from pos onwards, in page order.
+    
+    Uses Hyperscan's DFA when installed and falls back to the re module.
+    """
+    if ASSET_URL_DB is None:
+        yield from ASSET_URL_RE.finditer(buf, pos)
+        return
+    
+    starts = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        starts.add(pos + start)
+    
+    ASSET_URL_DB.scan(bytes(memoryview(buf)[pos:]), match_event_handler=on_match)
+    for start in sorted(starts):
+        yield ASSET_URL_RE.match(buf, start)
+
+
+async def read_asset_url(resp: aiohttp.ClientResponse) -> Optional[str]:
+    """Stream a page body until the comic image URL is found.
+    
+    Reading stops as soon as an amuniversal URL appears, or once
+    MAX_PAGE_BYTES have been read and a featureassets fallback is known.
+    """
+    buf = bytearray()
+    fallback = None
+    scan_from = 0
+    while True:
+        chunk = await resp.content.read(PAGE_CHUNK_SIZE)
+        eof = not chunk
+        buf += chunk
+        for match in iter_asset_urls(buf, scan_from):
+            # A match touching the end of the buffer may continue in the next chunk
+            if match.end() == len(buf) and not eof:
+                break
+            url = match.group(0)
+            if url.startswith(AMUNIVERSAL_PREFIX):
+                return url.decode('ascii')
+            if fallback is None:
+                fallback = bytes(url)
+        if eof or (fallback and len(buf) >= MAX_PAGE_BYTES):
+            break
+        scan_from = max(0, len(buf) - ASSET_URL_OVERLAP)
+    return fallback.decode('ascii') if fallback else None
+
+
+async def fetch_comic(session: aiohttp.ClientSession, slug: str, date: datetime,
+                      cached: Optional[dict] = None) -> Optional[dict]:
+    """Fetch a comic from GoComics for a specific date.
+    
+    When a cached archive entry is given, its validators are sent as a
+    conditional GET and a 304 reuses the cached image URL without a body.
+    """
     date_str = date.strftime("%Y/%m/%d")
     url = f"https://www.gocomics.com/{slug}/{date_str}"
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+    headers = PAGE_HEADERS
+    if cached and (cached.get("etag") or cached.get("last_modified")):
+        headers = dict(PAGE_HEADERS)
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     
     try:
-        resp = requests.get(url, headers=headers, timeout=15)
-        if resp.status_code != 200:
-            return None
-        
-        # Find the comic image URL
-        pattern = r'https://assets\.amuniversal\.com/[a-f0-9]+'
-        match = re.search(pattern, resp.text)
-        
-        if not match:
-            # Try featureassets
-            pattern2 = r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+'
-            match = re.search(pattern2, resp.text)
+        await PAGE_LIMITER.wait()
+        async with session.get(url, headers=headers, timeout=PAGE_TIMEOUT) as resp:
+            if resp.status == 304 and cached:
+                return {
+                    "image_url": cached["original_url"],
+                    "date": date.strftime("%Y-%m-%d"),
+                    "page_url": url,
+                    "etag": cached.get("etag"),
+                    "last_modified": cached.get("last_modified"),
+                }
+            if resp.status != 200:
+                return None
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            image_url = await read_asset_url(resp)
         
-        if match:
+        if image_url:
             return {
-                "image_url": match.group(0),
+                "image_url": image_url,
                 "date": date.strftime("%Y-%m-%d"),
-                "page_url": url
+                "page_url": url,
+                "etag": etag,
+                "last_modified": last_modified,
             }
     except Exception as e:
         print(f"  Error fetching {slug} for {date_str}: {e}")
@@ -71,24 +219,109 @@ def fetch_comic(slug: str, date: datetime) -> dict:
     return None
 
 
-def download_image(url: str, save_path: Path) -> bool:
-    """Download an image and save it."""
+async def download_image(session: aiohttp.ClientSession, url: str, blob_dir: Path,
+                         ext: str) -> Optional[str]:
+    """Download an image into the series' content-addressed store.
+    
+    The body is hashed while it streams to a temp file, which is then
+    renamed to by-hash/{sha256}{ext} (or dropped if that blob already
+    exists). Returns the SHA-256 hex digest, or None on failure.
+    """
+    tmp_path = None
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        }
-        resp = requests.get(url, headers=headers, timeout=30)
-        if resp.status_code == 200:
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(save_path, 'wb') as f:
-                f.write(resp.content)
-            return True
+        await IMAGE_LIMITER.wait()
+        async with session.get(url, timeout=IMAGE_TIMEOUT) as resp:
+            if resp.status == 200:
+                digest = hashlib.sha256()
+                fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=blob_dir)
+                try:
+                    async for chunk in resp.content.iter_chunked(65536):
+                        digest.update(chunk)
+                        os.write(fd, chunk)
+                finally:
+                    os.close(fd)
+                
+                sha256 = digest.hexdigest()
+                blob_path = blob_dir / f"{sha256}{ext}"
+                if blob_path.exists():
+                    os.unlink(tmp_path)
+                else:
+                    os.chmod(tmp_path, 0o644)
+                    os.replace(tmp_path, blob_path)
+                return sha256
     except Exception as e:
         print(f"  Error downloading image: {e}")
-    return False
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
+    return None
+
+
+def link_image(image_path: Path, blob_path: Path):
+    """Point a dated image name at its content-addressed blob."""
+    tmp_link = image_path.with_name(image_path.name + ".link")
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(os.path.relpath(blob_path, image_path.parent))
+    os.replace(tmp_link, image_path)
+
+
+def _newest_first(entry: dict) -> int:
+    """Sort key that orders archive entries by date, newest first."""
+    return -datetime.fromisoformat(entry["date"]).toordinal()
+
+
+def write_sidecar(sidecar_path: Path, entry: dict):
+    """Record an entry next to its image so the archive can be rebuilt losslessly."""
+    tmp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(entry))
+    os.replace(tmp_path, sidecar_path)
+
 
+def recover_orphan_images(archive: dict, entries_by_date: dict, comic_id: str,
+                          comics_dir: Path, meta_dir: Path, image_ext: str) -> int:
+    """Add archive entries for images on disk that the archive doesn't list.
+    
+    Happens when a run dies between saving an image and saving the archive,
+    or the archive file is lost. Entries come from the image's sidecar when
+    one exists, otherwise from the file name alone. Returns the count added.
+    """
+    recovered = 0
+    for image_path in comics_dir.glob(f"*{image_ext}"):
+        date_str = image_path.stem
+        if date_str in entries_by_date or not image_path.exists():
+            continue
+        try:
+            datetime.strptime(date_str, "%Y-%m-%d")
+        except ValueError:
+            continue
+        
+        sidecar_path = meta_dir / f"{date_str}.json"
+        if sidecar_path.exists():
+            entry = orjson.loads(sidecar_path.read_bytes())
+        else:
+            entry = {
+                "date": date_str,
+                "image_url": f"/data/comics/{comic_id}/{image_path.name}",
+                "original_url": "",
+                "page_url": ""
+            }
+        bisect.insort(archive["comics"], entry, key=_newest_first)
+        entries_by_date[date_str] = entry
+        recovered += 1
+    return recovered
+
+
+def save_archive(archive_file: Path, archive: dict, pretty: bool = False):
+    """Atomically write the archive so an interrupted run keeps its progress."""
+    archive["last_updated"] = datetime.now().isoformat()
+    tmp_file = archive_file.with_suffix('.json.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(archive, option=orjson.OPT_INDENT_2 if pretty else None))
+    os.replace(tmp_file, archive_file)
 
-def download_series(comic_id: str, comic_info: dict, count: int, data_dir: Path):
+
+async def download_series(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                          comic_id: str, comic_info: dict, count: int, data_dir: Path,
+                          pretty: bool = False):
     """Download comics for a series."""
     slug = comic_info["slug"]
     name = comic_info["name"]
@@ -100,74 +333,110 @@ def download_series(comic_id: str, comic_info: dict, count: int, data_dir: Path)
     # Load existing archive
     archive_file = data_dir / f"{comic_id}_archive.json"
     comics_dir = data_dir / "comics" / comic_id
-    comics_dir.mkdir(parents=True, exist_ok=True)
+    blob_dir = comics_dir / "by-hash"
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    meta_dir = comics_dir / "meta"
+    meta_dir.mkdir(exist_ok=True)
     
     if archive_file.exists():
-        with open(archive_file) as f:
-            archive = json.load(f)
+        with open(archive_file, 'rb') as f:
+            archive = orjson.loads(f.read())
     else:
         archive = {"comics": [], "last_updated": None}
     
-    existing_dates = {c["date"] for c in archive.get("comics", [])}
+    # Keep entries newest first; a no-op pass for archives this script wrote
+    archive.setdefault("comics", []).sort(key=_newest_first)
+    entries_by_date = {c["date"]: c for c in archive.get("comics", [])}
+    image_ext = ".gif"  # GoComics typically uses gif
+    
+    recovered = recover_orphan_images(archive, entries_by_date, comic_id, comics_dir, meta_dir, image_ext)
+    if recovered:
+        print(f"  ♻️  [{comic_id}] Recovered {recovered} image(s) missing from the archive")
+        save_archive(archive_file, archive, pretty)
+    
+    # Reprints reuse the same asset URL, so known URLs skip the download
+    hash_by_url = {c["original_url"]: c["sha256"] for c in archive["comics"] if c.get("sha256")}
     
     downloaded = 0
     skipped = 0
     failed = 0
     
     # Start from today and go backwards
-    current_date = datetime.now()
-    attempts = 0
+    today = datetime.now()
     max_attempts = count * 3  # Allow for some failures
     
-    while downloaded < count and attempts < max_attempts:
-        date_str = current_date.strftime("%Y-%m-%d")
-        
-        if date_str in existing_dates:
-            print(f"  ⏭️  {date_str} - already cached")
+    candidate_dates = []
+    for offset in range(max_attempts):
+        date = today - timedelta(days=offset)
+        date_str = date.strftime("%Y-%m-%d")
+        # Entries whose image went missing are re-checked with a conditional GET
+        if date_str in entries_by_date and (comics_dir / f"{date_str}{image_ext}").exists():
+            print(f"  ⏭️  [{comic_id}] {date_str} - already cached")
             skipped += 1
-            current_date -= timedelta(days=1)
-            attempts += 1
-            continue
-        
-        print(f"  📥 Fetching {date_str}...", end=" ", flush=True)
-        comic = fetch_comic(slug, current_date)
-        
-        if comic:
-            # Download the image
-            image_ext = ".gif"  # GoComics typically uses gif
-            image_path = comics_dir / f"{date_str}{image_ext}"
+        else:
+            candidate_dates.append(date)
+    
+    async def fetch_and_save(date: datetime):
+        nonlocal downloaded, failed
+        date_str = date.strftime("%Y-%m-%d")
+        async with semaphore:
+            cached = entries_by_date.get(date_str)
+            comic = await fetch_comic(session, slug, date, cached)
+            if not comic:
+                failed += 1
+                print(f"  📥 [{comic_id}] {date_str} ❌ Not found")
+                return
             
-            if download_image(comic["image_url"], image_path):
-                # Add to archive
-                archive_entry = {
-                    "date": date_str,
-                    "image_url": f"/data/comics/{comic_id}/{date_str}{image_ext}",
-                    "original_url": comic["image_url"],
-                    "page_url": comic["page_url"]
-                }
-                archive["comics"].append(archive_entry)
-                downloaded += 1
-                print(f"✅ Downloaded ({downloaded}/{count})")
-            else:
+            sha256 = hash_by_url.get(comic["image_url"])
+            if not sha256 or not (blob_dir / f"{sha256}{image_ext}").exists():
+                sha256 = await download_image(session, comic["image_url"], blob_dir, image_ext)
+            if not sha256:
                 failed += 1
-                print(f"❌ Failed to save")
-        else:
-            failed += 1
-            print(f"❌ Not found")
+                print(f"  📥 [{comic_id}] {date_str} ❌ Failed to save")
+                return
         
-        current_date -= timedelta(days=1)
-        attempts += 1
+        link_image(comics_dir / f"{date_str}{image_ext}", blob_dir / f"{sha256}{image_ext}")
+        hash_by_url[comic["image_url"]] = sha256
         
-        # Be nice to the server
-        time.sleep(0.5)
+        archive_entry = {
+            "date": date_str,
+            "image_url": f"/data/comics/{comic_id}/{date_str}{image_ext}",
+            "original_url": comic["image_url"],
+            "page_url": comic["page_url"],
+            "etag": comic["etag"],
+            "last_modified": comic["last_modified"],
+            "sha256": sha256,
+        }
+        write_sidecar(meta_dir / f"{date_str}.json", archive_entry)
+        if cached:
+            cached.update(archive_entry)
+        else:
+            bisect.insort(archive["comics"], archive_entry, key=_newest_first)
+            entries_by_date[date_str] = archive_entry
+        save_archive(archive_file, archive, pretty)
+        downloaded += 1
+        print(f"  📥 [{comic_id}] {date_str} ✅ Downloaded ({downloaded}/{count})")
     
-    # Sort archive by date (newest first)
-    archive["comics"] = sorted(archive["comics"], key=lambda x: x["date"], reverse=True)
-    archive["last_updated"] = datetime.now().isoformat()
+    pending_dates = iter(candidate_dates)
+    in_flight = 0
+    
+    async def worker():
+        nonlocal in_flight
+        # Reserve a quota slot before fetching (no await between check and reserve),
+        # so concurrent workers can't overshoot count; a failed fetch frees its slot
+        while downloaded + in_flight < count:
+            date = next(pending_dates, None)
+            if date is None:
+                return
+            in_flight += 1
+            try:
+                await fetch_and_save(date)
+            finally:
+                in_flight -= 1
+    
+    await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENCY)))
     
-    # Save archive
-    with open(archive_file, 'w') as f:
-        json.dump(archive, f, indent=2)
+    save_archive(archive_file, archive, pretty)
     
     print(f"\n{name} Summary:")
     print(f"  ✅ Downloaded: {downloaded}")
@@ -178,8 +447,16 @@ def download_series(comic_id: str, comic_info: dict, count: int, data_dir: Path)
     return downloaded, skipped, failed
 
 
-def main():
-    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+async def main():
+    parser = argparse.ArgumentParser(description="Download comic archives from GoComics.")
+    parser.add_argument("count", type=int, nargs="?", default=30, help="comics per series")
+    parser.add_argument("--pretty", action="store_true", help="pretty-print the archive JSON")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="max requests per second to each host")
+    args = parser.parse_args()
+    count = args.count
+    PAGE_LIMITER.set_rate(args.rate)
+    IMAGE_LIMITER.set_rate(args.rate)
     
     print(f"🎨 Comic Archive Downloader")
     print(f"   Downloading {count} comics per series")
@@ -187,15 +464,17 @@ def main():
     
     data_dir = project_root / "data"
     
-    total_downloaded = 0
-    total_skipped = 0
-    total_failed = 0
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit_per_host=4, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS) as session:
+        results = await asyncio.gather(*(
+            download_series(session, semaphore, comic_id, comic_info, count, data_dir, args.pretty)
+            for comic_id, comic_info in COMICS.items()
+        ))
     
-    for comic_id, comic_info in COMICS.items():
-        downloaded, skipped, failed = download_series(comic_id, comic_info, count, data_dir)
-        total_downloaded += downloaded
-        total_skipped += skipped
-        total_failed += failed
+    total_downloaded = sum(r[0] for r in results)
+    total_skipped = sum(r[1] for r in results)
+    total_failed = sum(r[2] for r in results)
     
     print(f"\n{'='*50}")
     print(f"🎉 All Downloads Complete!")
@@ -206,4 +485,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
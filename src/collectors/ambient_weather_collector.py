@@ -9,13 +9,91 @@ Data specs: https://github.com/ambient-weather/api-docs/wiki/Device-Data-Specs
 
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
 from typing import Dict, Any, Optional, List
 import aiohttp
+import orjson
 import os
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only stand-in for a missing device 'info' block
+_EMPTY = MappingProxyType({})
+
+_CARDINALS = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+              'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW')
+
+# (output key, lastData key) pairs for readings passed through as-is
+_FIELD_MAP = (
+    ('dateutc', 'dateutc'),
+    
+    # Temperature (outdoor)
+    ('temperature', 'tempf'),
+    ('feels_like', 'feelsLike'),
+    ('dew_point', 'dewPoint'),
+    
+    # Temperature (indoor)
+    ('temperature_indoor', 'tempinf'),
+    ('feels_like_indoor', 'feelsLikein'),
+    ('dew_point_indoor', 'dewPointin'),
+    
+    # Humidity
+    ('humidity', 'humidity'),
+    ('humidity_indoor', 'humidityin'),
+    
+    # Pressure
+    ('pressure_relative', 'baromrelin'),  # inHg
+    ('pressure_absolute', 'baromabsin'),  # inHg
+    
+    # Wind
+    ('wind_speed', 'windspeedmph'),
+    ('wind_gust', 'windgustmph'),
+    ('wind_direction', 'winddir'),
+    ('wind_gust_direction', 'windgustdir'),
+    ('max_daily_gust', 'maxdailygust'),
+    
+    # Wind averages
+    ('wind_speed_2m_avg', 'windspdmph_avg2m'),
+    ('wind_direction_2m_avg', 'winddir_avg2m'),
+    ('wind_speed_10m_avg', 'windspdmph_avg10m'),
+    ('wind_direction_10m_avg', 'winddir_avg10m'),
+    
+    # Rain
+    ('rain_hourly', 'hourlyrainin'),
+    ('rain_daily', 'dailyrainin'),
+    ('rain_weekly', 'weeklyrainin'),
+    ('rain_monthly', 'monthlyrainin'),
+    ('rain_yearly', 'yearlyrainin'),
+    ('rain_event', 'eventrainin'),
+    ('rain_total', 'totalrainin'),
+    ('last_rain', 'lastRain'),
+    
+    # Solar/UV
+    ('uv_index', 'uv'),
+    ('solar_radiation', 'solarradiation'),  # W/m²
+    
+    # Air Quality (if sensor present)
+    ('pm25', 'pm25'),
+    ('pm25_24h', 'pm25_24h'),
+    ('pm25_indoor', 'pm25_in'),
+    ('pm25_indoor_24h', 'pm25_in_24h'),
+    ('aqi_pm25', 'aqi_pm25_aqin'),
+    ('co2', 'co2'),
+    ('co2_indoor', 'co2_in_aqin'),
+    
+    # Lightning (if sensor present)
+    ('lightning_strikes_day', 'lightning_day'),
+    ('lightning_strikes_hour', 'lightning_hour'),
+    ('lightning_distance', 'lightning_distance'),
+    ('lightning_time', 'lightning_time'),
+    
+    # Additional sensors (soil, leaf, etc.)
+    ('soil_temp_1', 'soiltemp1f'),
+    ('soil_moisture_1', 'soilhum1'),
+)
+
 
 class AmbientWeatherCollector:
     """Collects weather data from local Ambient Weather station via their REST API."""
@@ -30,26 +108,45 @@ class AmbientWeatherCollector:
             application_key: Developer application key from AmbientWeather.net
             settings: Optional settings object with ambient_weather config
         """
-        self.api_key = api_key
-        self.application_key = application_key
-        
-        # Try to get from settings if not provided directly
-        if settings:
-            if hasattr(settings, 'ambient_weather'):
-                self.api_key = self.api_key or getattr(settings.ambient_weather, 'api_key', None)
-                self.application_key = self.application_key or getattr(settings.ambient_weather, 'application_key', None)
-        
-        # Fall back to environment variables
-        self.api_key = self.api_key or os.getenv('AMBIENT_WEATHER_API_KEY')
-        self.application_key = self.application_key or os.getenv('AMBIENT_WEATHER_APPLICATION_KEY')
+        # Resolve keys once: explicit args, then settings, then environment
+        aw_settings = getattr(settings, 'ambient_weather', None)
+        self.api_key = (api_key or getattr(aw_settings, 'api_key', None)
+                        or os.getenv('AMBIENT_WEATHER_API_KEY'))
+        self.application_key = (application_key or getattr(aw_settings, 'application_key', None)
+                                or os.getenv('AMBIENT_WEATHER_APPLICATION_KEY'))
+        self._configured = bool(self.api_key and self.application_key)
+        self._params = {
+            'apiKey': self.api_key,
+            'applicationKey': self.application_key
+        }
         
         self._cached_devices = None
-        self._cache_time = None
+        self._cache_expires_at = 0.0  # event loop (monotonic) time
         self._cache_duration = 60  # Cache for 60 seconds (API rate limited)
+        self._max_cache_duration = 600  # Upper bound on server-supplied lifetimes
+        
+        # Long-lived session so polls reuse the keep-alive connection
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=75, ttl_dns_cache=300)
+                    self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     def is_configured(self) -> bool:
         """Check if both required API keys are configured."""
-        return bool(self.api_key and self.application_key)
+        return self._configured
     
     async def get_devices(self) -> List[Dict[str, Any]]:
         """Fetch list of weather station devices and their latest data.
@@ -61,37 +158,32 @@ class AmbientWeatherCollector:
             return []
         
         # Check cache
-        if self._cached_devices and self._cache_time:
-            elapsed = (datetime.now() - self._cache_time).total_seconds()
-            if elapsed < self._cache_duration:
-                return self._cached_devices
+        loop = asyncio.get_running_loop()
+        if self._cached_devices and loop.time() < self._cache_expires_at:
+            return self._cached_devices
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.BASE_URL}/devices"
-                params = {
-                    'apiKey': self.api_key,
-                    'applicationKey': self.application_key
-                }
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        devices = await response.json()
-                        self._cached_devices = devices
-                        self._cache_time = datetime.now()
-                        logger.info(f"Fetched {len(devices)} Ambient Weather device(s)")
-                        return devices
-                    elif response.status == 429:
-                        logger.warning("Ambient Weather API rate limited (1 req/sec)")
-                        return self._cached_devices or []
-                    elif response.status == 401:
-                        logger.error("Ambient Weather API unauthorized - check your API keys")
-                        return []
-                    else:
-                        text = await response.text()
-                        logger.error(f"Ambient Weather API error {response.status}: {text}")
-                        return []
-                        
+            session = await self._get_session()
+            url = f"{self.BASE_URL}/devices"
+            
+            async with session.get(url, params=self._params, timeout=10) as response:
+                if response.status == 200:
+                    devices = orjson.loads(await response.read())
+                    self._cached_devices = devices
+                    self._cache_expires_at = loop.time() + self._cache_lifetime(response.headers)
+                    logger.info(f"Fetched {len(devices)} Ambient Weather device(s)")
+                    return devices
+                elif response.status == 429:
+                    logger.warning("Ambient Weather API rate limited (1 req/sec)")
+                    return self._cached_devices or []
+                elif response.status == 401:
+                    logger.error("Ambient Weather API unauthorized - check your API keys")
+                    return []
+                else:
+                    text = await response.text()
+                    logger.error(f"Ambient Weather API error {response.status}: {text}")
+                    return []
+                    
         except asyncio.TimeoutError:
             logger.error("Ambient Weather API timeout")
             return self._cached_devices or []
@@ -99,6 +191,32 @@ class AmbientWeatherCollector:
             logger.error(f"Ambient Weather API error: {e}")
             return self._cached_devices or []
     
+    def _cache_lifetime(self, headers) -> float:
+        """Seconds to reuse a devices response.
+        
+        Honors Cache-Control max-age (or Expires) when the API sends a longer
+        lifetime, but never polls faster than the default cache duration or
+        holds data longer than the maximum cache duration.
+        """
+        lifetime = None
+        for directive in headers.get('Cache-Control', '').split(','):
+            name, _, value = directive.strip().partition('=')
+            if name.lower() == 'max-age':
+                try:
+                    lifetime = float(value)
+                except ValueError:
+                    pass
+                break
+        
+        if lifetime is None and headers.get('Expires'):
+            try:
+                expires = parsedate_to_datetime(headers['Expires'])
+                lifetime = (expires - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+        
+        return min(max(self._cache_duration, lifetime or 0), self._max_cache_duration)
+    
     async def get_current_weather(self) -> Optional[Dict[str, Any]]:
         """Get current weather from the first available device.
         
@@ -110,8 +228,10 @@ class AmbientWeatherCollector:
         
         # Use first device's latest data
         device = devices[0]
-        last_data = device.get('lastData', {})
-        info = device.get('info', {})
+        last_data = device.get('lastData')
+        if not last_data:
+            return None
+        info = device.get('info') or _EMPTY
         
         # Parse the data
         return self._format_weather_data(last_data, info, device.get('macAddress', 'unknown'))
@@ -125,11 +245,11 @@ class AmbientWeatherCollector:
         stations = []
         
         for device in devices:
-            last_data = device.get('lastData', {})
-            info = device.get('info', {})
-            weather = self._format_weather_data(last_data, info, device.get('macAddress', 'unknown'))
-            if weather:
-                stations.append(weather)
+            last_data = device.get('lastData')
+            if not last_data:
+                continue
+            info = device.get('info') or _EMPTY
+            stations.append(self._format_weather_data(last_data, info, device.get('macAddress', 'unknown')))
         
         return stations
     
@@ -156,7 +276,7 @@ class AmbientWeatherCollector:
         if isinstance(timestamp, (int, float)):
             timestamp = datetime.fromtimestamp(timestamp / 1000).isoformat()
         
-        # Build comprehensive weather data
+        # Build comprehensive weather data, copying only the readings the station reports
         weather = {
             # Station info
             'station_name': station_name,
@@ -167,79 +287,19 @@ class AmbientWeatherCollector:
             
             # Timestamp
             'timestamp': timestamp,
-            'dateutc': data.get('dateutc'),
-            
-            # Temperature (outdoor)
-            'temperature': data.get('tempf'),
-            'feels_like': data.get('feelsLike'),
-            'dew_point': data.get('dewPoint'),
-            
-            # Temperature (indoor)
-            'temperature_indoor': data.get('tempinf'),
-            'feels_like_indoor': data.get('feelsLikein'),
-            'dew_point_indoor': data.get('dewPointin'),
-            
-            # Humidity
-            'humidity': data.get('humidity'),
-            'humidity_indoor': data.get('humidityin'),
-            
-            # Pressure
-            'pressure_relative': data.get('baromrelin'),  # inHg
-            'pressure_absolute': data.get('baromabsin'),  # inHg
-            
-            # Wind
-            'wind_speed': data.get('windspeedmph'),
-            'wind_gust': data.get('windgustmph'),
-            'wind_direction': data.get('winddir'),
-            'wind_gust_direction': data.get('windgustdir'),
-            'max_daily_gust': data.get('maxdailygust'),
-            
-            # Wind averages
-            'wind_speed_2m_avg': data.get('windspdmph_avg2m'),
-            'wind_direction_2m_avg': data.get('winddir_avg2m'),
-            'wind_speed_10m_avg': data.get('windspdmph_avg10m'),
-            'wind_direction_10m_avg': data.get('winddir_avg10m'),
-            
-            # Rain
-            'rain_hourly': data.get('hourlyrainin'),
-            'rain_daily': data.get('dailyrainin'),
-            'rain_weekly': data.get('weeklyrainin'),
-            'rain_monthly': data.get('monthlyrainin'),
-            'rain_yearly': data.get('yearlyrainin'),
-            'rain_event': data.get('eventrainin'),
-            'rain_total': data.get('totalrainin'),
-            'last_rain': data.get('lastRain'),
-            
-            # Solar/UV
-            'uv_index': data.get('uv'),
-            'solar_radiation': data.get('solarradiation'),  # W/m²
-            
-            # Air Quality (if sensor present)
-            'pm25': data.get('pm25'),
-            'pm25_24h': data.get('pm25_24h'),
-            'pm25_indoor': data.get('pm25_in'),
-            'pm25_indoor_24h': data.get('pm25_in_24h'),
-            'aqi_pm25': data.get('aqi_pm25_aqin'),
-            'co2': data.get('co2'),
-            'co2_indoor': data.get('co2_in_aqin'),
-            
-            # Lightning (if sensor present)
-            'lightning_strikes_day': data.get('lightning_day'),
-            'lightning_strikes_hour': data.get('lightning_hour'),
-            'lightning_distance': data.get('lightning_distance'),
-            'lightning_time': data.get('lightning_time'),
-            
-            # Battery status
-            'battery_outdoor': 'OK' if data.get('battout', 1) == 1 else 'Low',
-            'battery_indoor': 'OK' if data.get('battin', 1) == 1 else 'Low',
-            
-            # Additional sensors (soil, leaf, etc.)
-            'soil_temp_1': data.get('soiltemp1f'),
-            'soil_moisture_1': data.get('soilhum1'),
         }
+        weather.update(
+            (key, data[source]) for key, source in _FIELD_MAP if data.get(source) is not None
+        )
+        
+        # Battery status
+        weather['battery_outdoor'] = 'OK' if data.get('battout', 1) == 1 else 'Low'
+        weather['battery_indoor'] = 'OK' if data.get('battin', 1) == 1 else 'Low'
         
         # Remove None values for cleaner output
-        weather = {k: v for k, v in weather.items() if v is not None}
+        for key in ('station_name', 'station_location', 'timestamp'):
+            if weather[key] is None:
+                del weather[key]
         
         # Add formatted display strings
         if weather.get('temperature') is not None:
@@ -261,12 +321,10 @@ class AmbientWeatherCollector:
         
         return weather
     
-    def _degrees_to_cardinal(self, degrees: float) -> str:
+    @staticmethod
+    def _degrees_to_cardinal(degrees: float) -> str:
         """Convert wind direction degrees to cardinal direction."""
-        directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
-                      'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-        idx = round(degrees / 22.5) % 16
-        return directions[idx]
+        return _CARDINALS[int(degrees * 16 / 360 + 0.5) & 15]
     
     async def get_device_history(self, mac_address: str, limit: int = 288) -> List[Dict[str, Any]]:
         """Fetch historical data for a specific device.
@@ -282,26 +340,41 @@ class AmbientWeatherCollector:
             return []
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.BASE_URL}/devices/{mac_address}"
-                params = {
-                    'apiKey': self.api_key,
-                    'applicationKey': self.application_key,
-                    'limit': limit
-                }
-                
-                async with session.get(url, params=params, timeout=15) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"History fetch failed: {response.status}")
-                        return []
-                        
+            session = await self._get_session()
+            url = f"{self.BASE_URL}/devices/{mac_address}"
+            params = {**self._params, 'limit': limit}
+            
+            async with session.get(url, params=params, timeout=15) as response:
+                if response.status == 200:
+                    return orjson.loads(await response.read())
+                else:
+                    logger.error(f"History fetch failed: {response.status}")
+                    return []
+                    
         except Exception as e:
             logger.error(f"History fetch error: {e}")
             return []
 
 
+# Singleton instance
+_collector: Optional[AmbientWeatherCollector] = None
+
+async def get_ambient_weather_collector(api_key: str, application_key: str) -> AmbientWeatherCollector:
+    """Get the Ambient Weather collector singleton, rebuilding it if the keys change"""
+    global _collector
+    if _collector is None or (_collector.api_key, _collector.application_key) != (api_key, application_key):
+        if _collector is not None:
+            await _collector.close()
+        _collector = AmbientWeatherCollector(api_key=api_key, application_key=application_key)
+    return _collector
+
+
+async def close_ambient_weather_collector():
+    """Close the singleton's HTTP session on shutdown"""
+    if _collector is not None:
+        await _collector.close()
+
+
 # Quick test function
 async def test_ambient_weather():
     """Test the Ambient Weather collector."""
@@ -325,6 +398,8 @@ async def test_ambient_weather():
         weather = await collector.get_current_weather()
         for key, value in weather.items():
             print(f"  {key}: {value}")
+    
+    await collector.close()
 
 
 if __name__ == "__main__":
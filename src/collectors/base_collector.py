@@ -4,6 +4,8 @@ Base collector class for personal dashboard collectors.
 
 import asyncio
 import json
+import threading
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass
@@ -17,13 +19,48 @@ class CollectionResult:
     error: Optional[str] = None
     timestamp: Optional[datetime] = None
 
+# Shared HTTP clients for the app's event loop, keyed by the module that uses them.
+# Each is created on first use so connections are reused across calls, and all of
+# them are closed together on shutdown.
+_shared_clients: Dict[str, httpx.AsyncClient] = {}
+
+def get_shared_client(name: str, **client_kwargs) -> httpx.AsyncClient:
+    """Get the shared HTTP client registered under name, creating it on first use"""
+    client = _shared_clients.get(name)
+    if client is None or client.is_closed:
+        client = _shared_clients[name] = httpx.AsyncClient(**client_kwargs)
+    return client
+
+async def close_shared_clients():
+    """Close every shared HTTP client"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+# Background threads run each collection in their own short-lived loop
+# (asyncio.run), which can't share the collectors' client.
+_CLIENT_KWARGS = dict(
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    http2=True,
+)
+
+def _get_client() -> Optional[httpx.AsyncClient]:
+    """Get the collectors' shared HTTP client, or None when not on the main thread"""
+    if threading.current_thread() is not threading.main_thread():
+        return None
+    return get_shared_client("collectors", **_CLIENT_KWARGS)
+
 class BaseCollector:
     """Base class for all data collectors."""
     
+    rate_limit_delay: float = 0.5  # seconds between requests; override per subclass
+    
     def __init__(self, settings=None):
         self.settings = settings
-        self.rate_limit_delay = 0.5  # seconds between requests
-        self.last_request_time = 0
+        self.last_request_time: float = 0.0  # time.monotonic() of the last request
+        self._timeout = 10.0
     
     async def collect_data(self) -> CollectionResult:
         """Override this method in subclasses."""
@@ -35,16 +72,19 @@ class BaseCollector:
     
     async def _rate_limit(self):
         """Apply rate limiting between requests."""
-        import time
-        current_time = time.time()
+        current_time = time.monotonic()
         time_since_last = current_time - self.last_request_time
         if time_since_last < self.rate_limit_delay:
             await asyncio.sleep(self.rate_limit_delay - time_since_last)
-        self.last_request_time = time.time()
+        self.last_request_time = time.monotonic()
     
     async def _fetch_json(self, url: str, headers: Optional[Dict] = None, timeout: float = 10.0) -> Dict[str, Any]:
         """Fetch JSON from a URL."""
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(url, headers=headers or {})
-            response.raise_for_status()
-            return response.json()
+        client = _get_client()
+        if client is None:
+            async with httpx.AsyncClient(**_CLIENT_KWARGS) as client:
+                response = await client.get(url, headers=headers or {}, timeout=timeout)
+        else:
+            response = await client.get(url, headers=headers or {}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
@@ -8,16 +8,35 @@ Fetches Bloom County comics from GoComics.com
 """
 
 import os
+import re
 import json
-import requests
+import asyncio
+import heapq
+import random
+import httpx
+import orjson
 import logging
+import soupsieve
+from operator import itemgetter
 from datetime import datetime, timedelta
 from pathlib import Path
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List
 
+try:
+    import hishel
+    HISHEL_AVAILABLE = True
+except ImportError:
+    HISHEL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Compiled once; used on every comic page
+_FEATUREASSETS_RE = re.compile(r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+')
+_SEL_OG_IMAGE = soupsieve.compile('meta[property="og:image"]')
+_SEL_OG_TITLE = soupsieve.compile('meta[property="og:title"]')
+_SEL_CANONICAL = soupsieve.compile('link[rel~="canonical"]')
+
 class BloomCountyCollector:
     """Collector for Bloom County comics from GoComics."""
     
@@ -27,6 +46,8 @@ class BloomCountyCollector:
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.5"
     }
+    ARCHIVE_CONCURRENCY = 8  # simultaneous requests during download_archive
+    MIN_IMAGE_BYTES = 1024  # smaller cached files are treated as broken and re-fetched
     
     def __init__(self, cache_dir: str = None):
         # Use absolute paths based on project root
@@ -37,94 +58,151 @@ class BloomCountyCollector:
             self.cache_dir = project_root / "data" / "comics" / "bloomcounty"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_file = project_root / "data" / "bloomcounty_archive.json"
+        self.http_cache_dir = project_root / "data" / "http_cache" / "bloomcounty"
+        # Pooled HTTP/2 client so archive runs reuse one connection to GoComics
+        self.session = httpx.Client(
+            http2=True,
+            headers=self.HEADERS,
+            timeout=15,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=30)
+        )
         self._load_cache()
     
+    def close(self):
+        """Close the pooled HTTP client."""
+        self.session.close()
+    
     def _load_cache(self):
         """Load cached comic metadata."""
         if self.cache_file.exists():
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
+            with open(self.cache_file, 'rb') as f:
+                self.cache = orjson.loads(f.read())
         else:
             self.cache = {"comics": [], "last_updated": None}
+        self._ids_index = {c['id'] for c in self.cache.get('comics', [])}
     
     def _save_cache(self):
         """Save comic metadata to cache."""
         self.cache["last_updated"] = datetime.now().isoformat()
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+        tmp_file = self.cache_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(self.cache, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, self.cache_file)
     
-    def _fetch_comic_page(self, url: str) -> Optional[Dict[str, Any]]:
+    def _fetch_comic_page(self, url: str, date: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
         """Fetch and parse a single comic page."""
         try:
-            resp = requests.get(url, headers=self.HEADERS, timeout=15)
+            resp = self.session.get(url)
             if resp.status_code != 200:
                 logger.warning(f"Failed to fetch {url}: {resp.status_code}")
                 return None
-            
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # First try to find the comic image from featureassets
-            image_url = None
-            
-            # Look for featureassets URL in page content
-            import re
-            featureassets_match = re.search(r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+', resp.text)
-            if featureassets_match:
-                image_url = featureassets_match.group(0)
-            
-            # Fallback: try og:image meta tag
-            if not image_url:
-                og_image = soup.select_one('meta[property="og:image"]')
-                if og_image and og_image.get('content'):
-                    image_url = og_image['content']
-                    # Skip placeholder images
-                    if 'GC_Social' in image_url or 'staging-assets' in image_url:
-                        image_url = None
-            
-            # Check for challenge/block
-            if not image_url or 'challenge.svg' in str(image_url):
-                logger.warning(f"Blocked or no image for {url}")
+            return self._parse_comic_page(url, resp.text, date, redirected=bool(resp.history))
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+    
+    async def _fetch_comic_page_async(self, client: httpx.AsyncClient, url: str,
+                                      date: Optional[datetime] = None,
+                                      fallback_client: Optional[httpx.AsyncClient] = None) -> Optional[Dict[str, Any]]:
+        """Async variant of _fetch_comic_page for archive downloads.
+        
+        If `client` served a cached page with no usable comic (e.g. a stored
+        challenge page), the page is fetched again through `fallback_client`.
+        """
+        try:
+            resp = await client.get(url)
+            if resp.status_code != 200:
+                logger.warning(f"Failed to fetch {url}: {resp.status_code}")
                 return None
-            
-            # Get title
-            og_title = soup.select_one('meta[property="og:title"]')
-            title = og_title['content'] if og_title and og_title.get('content') else "Bloom County"
-            
-            # Get canonical link
-            canonical = soup.find('link', rel='canonical')
-            link = canonical['href'] if canonical and canonical.get('href') else url
-            
-            # Parse date from URL or canonical link
-            parse_url = link if link else url
-            parts = parse_url.rstrip('/').split('/')
-            comic_id = datetime.now().strftime("%Y-%m-%d")
-            if len(parts) >= 3:
-                try:
-                    y, m, d = parts[-3], parts[-2], parts[-1]
-                    if y.isdigit() and len(y) == 4:
-                        comic_id = f"{y}-{m.zfill(2)}-{d.zfill(2)}"
-                except:
-                    pass
-            
-            return {
-                "id": comic_id,
-                "series": "bloomcounty",
-                "title": title,
-                "date": comic_id,
-                "image_url": image_url,
-                "link": link,
-                "attribution": "© Berkeley Breathed / GoComics"
-            }
+            comic = self._parse_comic_page(url, resp.text, date, redirected=bool(resp.history))
+            if comic is None and fallback_client and resp.extensions.get("from_cache"):
+                return await self._fetch_comic_page_async(fallback_client, url, date)
+            return comic
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
     
-    def _add_to_cache(self, comic: Dict[str, Any]):
-        """Add comic to cache if not already present."""
-        existing_ids = {c['id'] for c in self.cache.get('comics', [])}
-        if comic['id'] not in existing_ids:
-            self.cache['comics'].append(comic)
-            self._save_cache()
+    def _parse_comic_page(self, url: str, html: str, date: Optional[datetime] = None,
+                          redirected: bool = False) -> Optional[Dict[str, Any]]:
+        """Extract comic metadata from a fetched page.
+        
+        When the requested date is known, the request was not redirected to
+        another strip, and the featureassets URL is in the page, the metadata
+        is built without parsing the HTML at all.
+        """
+        # First try to find the comic image from featureassets
+        image_url = None
+        
+        # Look for featureassets URL in page content
+        featureassets_match = _FEATUREASSETS_RE.search(html)
+        if featureassets_match:
+            image_url = featureassets_match.group(0)
+            if date and not redirected:
+                comic_id = date.strftime("%Y-%m-%d")
+                return {
+                    "id": comic_id,
+                    "series": "bloomcounty",
+                    "title": "Bloom County",
+                    "date": comic_id,
+                    "image_url": image_url,
+                    "link": url,
+                    "attribution": "© Berkeley Breathed / GoComics"
+                }
+        
+        soup = BeautifulSoup(html, "lxml")
+        
+        # Fallback: try og:image meta tag
+        if not image_url:
+            og_image = _SEL_OG_IMAGE.select_one(soup)
+            if og_image and og_image.get('content'):
+                image_url = og_image['content']
+                # Skip placeholder images
+                if 'GC_Social' in image_url or 'staging-assets' in image_url:
+                    image_url = None
+        
+        # Check for challenge/block
+        if not image_url or 'challenge.svg' in str(image_url):
+            logger.warning(f"Blocked or no image for {url}")
+            return None
+        
+        # Get title
+        og_title = _SEL_OG_TITLE.select_one(soup)
+        title = og_title['content'] if og_title and og_title.get('content') else "Bloom County"
+        
+        # Get canonical link
+        canonical = _SEL_CANONICAL.select_one(soup)
+        link = canonical['href'] if canonical and canonical.get('href') else url
+        
+        # Parse date from URL or canonical link
+        parse_url = link if link else url
+        parts = parse_url.rstrip('/').split('/')
+        comic_id = datetime.now().strftime("%Y-%m-%d")
+        if len(parts) >= 3:
+            try:
+                y, m, d = parts[-3], parts[-2], parts[-1]
+                if y.isdigit() and len(y) == 4:
+                    comic_id = f"{y}-{m.zfill(2)}-{d.zfill(2)}"
+            except:
+                pass
+        
+        return {
+            "id": comic_id,
+            "series": "bloomcounty",
+            "title": title,
+            "date": comic_id,
+            "image_url": image_url,
+            "link": link,
+            "attribution": "© Berkeley Breathed / GoComics"
+        }
+    
+    def _add_to_cache(self, comic: Dict[str, Any]) -> bool:
+        """Add comic to cache if not already present; the caller decides when to save."""
+        if comic['id'] in self._ids_index:
+            return False
+        self._ids_index.add(comic['id'])
+        self.cache['comics'].append(comic)
+        return True
     
     def get_daily(self) -> Dict[str, Any]:
         """Get today's Bloom County comic and cache it."""
@@ -132,95 +210,171 @@ class BloomCountyCollector:
         today = datetime.now()
         comic = self.get_by_date(today)
         if comic:
-            self._add_to_cache(comic)
+            if self._add_to_cache(comic):
+                self._save_cache()
             return {"success": True, "comic": comic}
         # Try yesterday if today's not available yet
         yesterday = today - timedelta(days=1)
         comic = self.get_by_date(yesterday)
         if comic:
-            self._add_to_cache(comic)
+            if self._add_to_cache(comic):
+                self._save_cache()
             return {"success": True, "comic": comic}
         return {"success": False, "error": "Failed to fetch daily comic"}
     
     def get_by_date(self, date: datetime) -> Optional[Dict[str, Any]]:
         """Get comic for a specific date."""
         url = f"{self.BASE_URL}/{date.year}/{date.month}/{date.day}"
-        return self._fetch_comic_page(url)
+        return self._fetch_comic_page(url, date)
+    
+    def _image_path(self, image_url: str, comic_id: str) -> Path:
+        """Local cache path for a comic image."""
+        # Determine file extension
+        ext = "gif"
+        if ".png" in image_url.lower():
+            ext = "png"
+        elif ".jpg" in image_url.lower() or ".jpeg" in image_url.lower():
+            ext = "jpg"
+        
+        return self.cache_dir / f"{comic_id}.{ext}"
+    
+    def _has_image(self, filepath: Path) -> bool:
+        """Whether a complete image is already cached (not an empty or truncated stub)."""
+        try:
+            return filepath.stat().st_size > self.MIN_IMAGE_BYTES
+        except FileNotFoundError:
+            return False
     
     def download_image(self, image_url: str, comic_id: str) -> Optional[str]:
         """Download and cache comic image."""
         try:
-            # Determine file extension
-            ext = "gif"
-            if ".png" in image_url.lower():
-                ext = "png"
-            elif ".jpg" in image_url.lower() or ".jpeg" in image_url.lower():
-                ext = "jpg"
+            filepath = self._image_path(image_url, comic_id)
             
-            filename = f"{comic_id}.{ext}"
-            filepath = self.cache_dir / filename
-            
-            if filepath.exists():
+            if self._has_image(filepath):
                 return str(filepath)
             
-            resp = requests.get(image_url, headers=self.HEADERS, timeout=30)
-            if resp.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(resp.content)
-                logger.info(f"Downloaded: {filename}")
+            tmp_path = filepath.with_name(filepath.name + ".part")
+            with self.session.stream('GET', image_url, timeout=30) as resp:
+                if resp.status_code != 200:
+                    logger.warning(f"Failed to download {image_url}: {resp.status_code}")
+                    return None
+                with open(tmp_path, 'wb') as f:
+                    for chunk in resp.iter_bytes(65536):
+                        f.write(chunk)
+            os.replace(tmp_path, filepath)
+            logger.info(f"Downloaded: {filepath.name}")
+            return str(filepath)
+        except Exception as e:
+            logger.error(f"Error downloading {image_url}: {e}")
+            return None
+    
+    async def _download_image_async(self, client: httpx.AsyncClient, image_url: str, comic_id: str) -> Optional[str]:
+        """Async variant of download_image for archive downloads."""
+        try:
+            filepath = self._image_path(image_url, comic_id)
+            
+            if self._has_image(filepath):
                 return str(filepath)
-            else:
-                logger.warning(f"Failed to download {image_url}: {resp.status_code}")
-                return None
+            
+            tmp_path = filepath.with_name(filepath.name + ".part")
+            async with client.stream('GET', image_url, timeout=30) as resp:
+                if resp.status_code != 200:
+                    logger.warning(f"Failed to download {image_url}: {resp.status_code}")
+                    return None
+                with open(tmp_path, 'wb') as f:
+                    async for chunk in resp.aiter_bytes(65536):
+                        f.write(chunk)
+            os.replace(tmp_path, filepath)
+            logger.info(f"Downloaded: {filepath.name}")
+            return str(filepath)
         except Exception as e:
             logger.error(f"Error downloading {image_url}: {e}")
             return None
     
-    def download_archive(self, years: int = 5, save_images: bool = True) -> Dict[str, Any]:
-        """Download comics from the last N years."""
+    def _page_cache_client(self) -> Optional[httpx.AsyncClient]:
+        """On-disk cached client for historic comic pages, if hishel is installed.
+        
+        Past GoComics pages never change but are served without cache headers,
+        so responses are force-cached; re-runs then read them from disk.
+        """
+        if not HISHEL_AVAILABLE:
+            return None
+        self.http_cache_dir.mkdir(parents=True, exist_ok=True)
+        return hishel.AsyncCacheClient(
+            storage=hishel.AsyncFileStorage(base_path=self.http_cache_dir),
+            controller=hishel.Controller(force_cache=True, allow_stale=True),
+            http2=True,
+            headers=self.HEADERS,
+            timeout=15,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.ARCHIVE_CONCURRENCY)
+        )
+    
+    async def download_archive(self, years: int = 5, save_images: bool = True) -> Dict[str, Any]:
+        """Download comics from the last N years.
+        
+        Missing archive dates are fetched concurrently, at most
+        ARCHIVE_CONCURRENCY at a time.
+        """
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=years * 365)
         
         downloaded = 0
         failed = 0
-        skipped = 0
         
-        # Get existing comic IDs
-        existing_ids = {c['id'] for c in self.cache.get('comics', [])}
+        # Newest first; dict keeps insertion order
+        targets = {
+            date.strftime("%Y-%m-%d"): date
+            for date in (end_date - timedelta(days=i) for i in range(years * 365 + 1))
+        }
+        dates = [date for comic_id, date in targets.items() if comic_id not in self._ids_index]
+        skipped = len(targets) - len(dates)
         
-        current_date = end_date
-        while current_date >= start_date:
-            comic_id = current_date.strftime("%Y-%m-%d")
-            
-            # Skip if already have it
-            if comic_id in existing_ids:
-                skipped += 1
-                current_date -= timedelta(days=1)
-                continue
-            
-            comic = self.get_by_date(current_date)
-            if comic:
-                if save_images:
-                    local_path = self.download_image(comic['image_url'], comic_id)
+        semaphore = asyncio.Semaphore(self.ARCHIVE_CONCURRENCY)
+        # Recent pages may still change (comic not posted yet), so only older ones are cached
+        cache_cutoff = end_date - timedelta(days=2)
+        page_cache_client = self._page_cache_client()
+        
+        async def fetch_date(client: httpx.AsyncClient, date: datetime):
+            nonlocal downloaded, failed
+            comic_id = date.strftime("%Y-%m-%d")
+            async with semaphore:
+                url = f"{self.BASE_URL}/{date.year}/{date.month}/{date.day}"
+                if page_cache_client and date < cache_cutoff:
+                    comic = await self._fetch_comic_page_async(page_cache_client, url, date, fallback_client=client)
+                else:
+                    comic = await self._fetch_comic_page_async(client, url, date)
+                if comic and save_images:
+                    local_path = await self._download_image_async(client, comic['image_url'], comic_id)
                     if local_path:
                         comic['local_path'] = local_path
                 
-                self.cache['comics'].append(comic)
-                existing_ids.add(comic_id)
-                downloaded += 1
-                
-                # Save periodically
-                if downloaded % 50 == 0:
-                    self._save_cache()
-                    logger.info(f"Progress: {downloaded} downloaded, {failed} failed, {skipped} skipped")
-            else:
+                # Be nice to the server
+                await asyncio.sleep(0.5)
+            
+            if not comic:
                 failed += 1
+                return
             
-            current_date -= timedelta(days=1)
+            self._add_to_cache(comic)
+            downloaded += 1
             
-            # Be nice to the server
-            import time
-            time.sleep(0.5)
+            # Save periodically
+            if downloaded % 50 == 0:
+                self._save_cache()
+                logger.info(f"Progress: {downloaded} downloaded, {failed} failed, {skipped} skipped")
+        
+        async with httpx.AsyncClient(
+            http2=True,
+            headers=self.HEADERS,
+            timeout=15,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.ARCHIVE_CONCURRENCY)
+        ) as client:
+            try:
+                await asyncio.gather(*(fetch_date(client, date) for date in dates))
+            finally:
+                if page_cache_client:
+                    await page_cache_client.aclose()
         
         # Final save
         self._save_cache()
@@ -235,7 +389,6 @@ class BloomCountyCollector:
     
     def get_random(self) -> Dict[str, Any]:
         """Get a random comic from the cache."""
-        import random
         if not self.cache.get('comics'):
             return self.get_daily()
         
@@ -244,8 +397,8 @@ class BloomCountyCollector:
     
     def get_archive_list(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get list of cached comics sorted by date."""
-        comics = sorted(self.cache.get('comics', []), key=lambda x: x['date'], reverse=True)
-        return comics[:limit]
+        # ISO dates compare correctly as strings
+        return heapq.nlargest(limit, self.cache.get('comics', []), key=itemgetter('date'))
 
 
 def main():
@@ -271,12 +424,14 @@ def main():
     else:
         print(f"Downloading Bloom County comics from the last {args.years} years...")
         print("This may take a while. Progress will be logged.")
-        result = collector.download_archive(years=args.years, save_images=not args.no_images)
+        result = asyncio.run(collector.download_archive(years=args.years, save_images=not args.no_images))
         print(f"\nComplete!")
         print(f"  Downloaded: {result['downloaded']}")
         print(f"  Failed: {result['failed']}")
         print(f"  Skipped (already cached): {result['skipped']}")
         print(f"  Total in cache: {result['total_cached']}")
+    
+    collector.close()
 
 
 if __name__ == "__main__":
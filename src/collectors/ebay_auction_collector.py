@@ -1,13 +1,97 @@
 """eBay Auction Collector for Retro Tech"""
+import asyncio
 import httpx
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 
+from .base_collector import get_shared_client
+
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Only listing rows are parsed; the rest of the results page is skipped
+_ITEM_STRAINER = SoupStrainer('li', class_='s-item')
+_PRICE_RE = re.compile(r'\$([0-9,.]+)')
+
+# Sample data shown when eBay is unavailable; built once, callers get per-call copies
+_SAMPLE_AUCTIONS = (
+    {
+        'id': 'sample1',
+        'title': 'IBM ThinkPad T42 - Vintage Laptop - Working',
+        'current_price': '45.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=thinkpad+t42',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '2h 30m',
+        'source': 'ebay_sample'
+    },
+    {
+        'id': 'sample2',
+        'title': 'Nintendo 64 Console + Controller - Tested',
+        'current_price': '65.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=nintendo+64',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '4h 15m',
+        'source': 'ebay_sample'
+    },
+    {
+        'id': 'sample3',
+        'title': 'Vintage Apple PowerBook G4 - For Parts/Repair',
+        'current_price': '30.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=powerbook+g4',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '6h 45m',
+        'source': 'ebay_sample'
+    },
+    {
+        'id': 'sample4',
+        'title': 'Sega Genesis Model 1 Console Bundle',
+        'current_price': '55.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=sega+genesis',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '8h 20m',
+        'source': 'ebay_sample'
+    },
+    {
+        'id': 'sample5',
+        'title': 'Dell Latitude D630 - Retro Business Laptop',
+        'current_price': '35.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=dell+latitude+d630',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '12h 10m',
+        'source': 'ebay_sample'
+    },
+    {
+        'id': 'sample6',
+        'title': 'Sony PlayStation 2 Slim - Works Great',
+        'current_price': '40.00',
+        'link': 'https://www.ebay.com/sch/i.html?_nkw=ps2+slim',
+        'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
+        'time_left': '1d 2h',
+        'source': 'ebay_sample'
+    },
+)
+
+MAX_AUCTIONS = 12  # auctions returned per search
+MAX_SCANNED_ITEMS = 24  # rows examined to find them (some are not auctions)
+
+_CLIENT_KWARGS = dict(
+    http2=True,
+    follow_redirects=True,
+    # Use a browser-like user agent
+    headers={
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept-Language': 'en-US,en;q=0.9'
+    }
+)
+
 
 class EBayAuctionCollector:
     """Collector for eBay auctions - retro laptops, gaming systems"""
@@ -40,16 +124,11 @@ class EBayAuctionCollector:
             if category:
                 params['_sacat'] = category
             
-            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                # Use a browser-like user agent
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept-Language': 'en-US,en;q=0.9'
-                }
-                response = await client.get(self.base_url, params=params, headers=headers)
-                response.raise_for_status()
-                
-                return self._parse_results(response.text)
+            client = get_shared_client("ebay", **_CLIENT_KWARGS)
+            response = await client.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            
+            return self._parse_results(response.text)
         except Exception as e:
             logger.error(f"Error searching eBay: {e}")
             return []
@@ -58,49 +137,21 @@ class EBayAuctionCollector:
         """Parse eBay HTML results"""
         auctions = []
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            if SELECTOLAX_AVAILABLE:
+                items = (self._item_fields_selectolax(item)
+                         for item in HTMLParser(html).css('li.s-item')[:MAX_SCANNED_ITEMS])
+            else:
+                soup = BeautifulSoup(html, 'lxml', parse_only=_ITEM_STRAINER)
+                items = (self._item_fields_bs4(item)
+                         for item in soup.find_all('li', class_='s-item', limit=MAX_SCANNED_ITEMS))
             
-            # Find all item listings
-            items = soup.select('li.s-item')
-            
-            for item in items[:12]:  # Get top 12 items
+            for fields in items:
+                if len(auctions) >= MAX_AUCTIONS:
+                    break
                 try:
-                    # Title
-                    title_elem = item.select_one('.s-item__title')
-                    title = title_elem.get_text(strip=True) if title_elem else 'Unknown'
-                    
-                    # Price
-                    price_elem = item.select_one('.s-item__price')
-                    price_text = price_elem.get_text(strip=True) if price_elem else '$0.00'
-                    # Extract numeric price
-                    price_match = re.search(r'\$([0-9,.]+)', price_text)
-                    price = price_match.group(1) if price_match else '0.00'
-                    
-                    # Link
-                    link_elem = item.select_one('a.s-item__link')
-                    link = link_elem.get('href') if link_elem else '#'
-                    
-                    # Image
-                    img_elem = item.select_one('img.s-item__image-img, img.s-item__image')
-                    image_url = (img_elem.get('src') or img_elem.get('data-src')) if img_elem else '/static/images/ebay-default.png'
-                    
-                    # Time left (from subtitle)
-                    time_elem = item.select_one('.s-item__time-left')
-                    time_left = time_elem.get_text(strip=True) if time_elem else 'Time unknown'
-                    
-                    # Only include if auction is actually found
-                    purchase_type = item.select_one('.s-item__purchase-options-with-icon')
-                    is_auction = purchase_type and ('Auction' in purchase_type.get_text())
-                    if is_auction or 'Time' in time_left:
-                        auctions.append({
-                            'id': link.split('itm/')[-1].split('?')[0] if '/itm/' in link else '',
-                            'title': title,
-                            'current_price': price,
-                            'link': link,
-                            'image_url': image_url,
-                            'time_left': time_left,
-                            'source': 'ebay'
-                        })
+                    auction = self._build_auction(*fields)
+                    if auction:
+                        auctions.append(auction)
                 except Exception as e:
                     logger.debug(f"Error parsing item: {e}")
                     continue
@@ -109,23 +160,84 @@ class EBayAuctionCollector:
         
         return auctions
     
+    @staticmethod
+    def _item_fields_selectolax(item) -> tuple:
+        """Extract raw (title, price, link, image, time left, purchase type) from a selectolax node"""
+        title_elem = item.css_first('.s-item__title')
+        price_elem = item.css_first('.s-item__price')
+        link_elem = item.css_first('a.s-item__link')
+        img_elem = item.css_first('img.s-item__image-img, img.s-item__image')
+        time_elem = item.css_first('.s-item__time-left')
+        purchase_elem = item.css_first('.s-item__purchase-options-with-icon')
+        return (
+            title_elem.text(strip=True) if title_elem else None,
+            price_elem.text(strip=True) if price_elem else None,
+            link_elem.attributes.get('href') if link_elem else None,
+            (img_elem.attributes.get('src') or img_elem.attributes.get('data-src')) if img_elem else None,
+            time_elem.text(strip=True) if time_elem else None,
+            purchase_elem.text() if purchase_elem else None,
+        )
+    
+    @staticmethod
+    def _item_fields_bs4(item) -> tuple:
+        """Extract raw (title, price, link, image, time left, purchase type) from a BeautifulSoup tag"""
+        title_elem = item.select_one('.s-item__title')
+        price_elem = item.select_one('.s-item__price')
+        link_elem = item.select_one('a.s-item__link')
+        img_elem = item.select_one('img.s-item__image-img, img.s-item__image')
+        time_elem = item.select_one('.s-item__time-left')
+        purchase_elem = item.select_one('.s-item__purchase-options-with-icon')
+        return (
+            title_elem.get_text(strip=True) if title_elem else None,
+            price_elem.get_text(strip=True) if price_elem else None,
+            link_elem.get('href') if link_elem else None,
+            (img_elem.get('src') or img_elem.get('data-src')) if img_elem else None,
+            time_elem.get_text(strip=True) if time_elem else None,
+            purchase_elem.get_text() if purchase_elem else None,
+        )
+    
+    @staticmethod
+    def _build_auction(title, price_text, link, image_url, time_left, purchase_type) -> Optional[Dict[str, Any]]:
+        """Build an auction dict from raw item fields, or None if the item isn't an auction"""
+        title = title or 'Unknown'
+        # Extract numeric price
+        price_match = _PRICE_RE.search(price_text or '$0.00')
+        price = price_match.group(1) if price_match else '0.00'
+        link = link or '#'
+        image_url = image_url or '/static/images/ebay-default.png'
+        time_left = time_left or 'Time unknown'
+        
+        # Only include if auction is actually found
+        is_auction = purchase_type and 'Auction' in purchase_type
+        if not (is_auction or 'Time' in time_left):
+            return None
+        return {
+            'id': link.split('itm/')[-1].split('?')[0] if '/itm/' in link else '',
+            'title': title,
+            'current_price': price,
+            'link': link,
+            'image_url': image_url,
+            'time_left': time_left,
+            'source': 'ebay'
+        }
+    
     async def get_retro_tech_auctions(self) -> List[Dict[str, Any]]:
         """Get retro laptops and gaming systems with great prices ending soon"""
         all_auctions = []
         
         try:
-            # Search for retro laptops
-            laptop_auctions = await self.search_auctions(
-                "retro laptop vintage",
-                category="177"  # Computers/Tablets category
+            # Search retro laptops and vintage gaming systems concurrently
+            laptop_auctions, gaming_auctions = await asyncio.gather(
+                self.search_auctions(
+                    "retro laptop vintage",
+                    category="177"  # Computers/Tablets category
+                ),
+                self.search_auctions(
+                    "vintage gaming system retro console",
+                    category="16734"  # Video Games category
+                )
             )
             all_auctions.extend(laptop_auctions)
-            
-            # Search for vintage gaming systems
-            gaming_auctions = await self.search_auctions(
-                "vintage gaming system retro console",
-                category="16734"  # Video Games category
-            )
             all_auctions.extend(gaming_auctions)
         except Exception as e:
             logger.warning(f"eBay fetch failed, using sample data: {e}")
@@ -134,71 +246,25 @@ class EBayAuctionCollector:
         if not all_auctions:
             all_auctions = self._get_sample_auctions()
         
-        # Remove duplicates and sort by time_left
-        seen_ids = set()
-        unique_auctions = []
+        # Remove duplicates in one pass (dicts keep insertion order); listings
+        # without an id are keyed by identity so they aren't merged together
+        unique_auctions = {}
         for auction in all_auctions:
-            if auction.get('id') not in seen_ids:
-                seen_ids.add(auction.get('id'))
-                unique_auctions.append(auction)
+            unique_auctions.setdefault(auction.get('id') or id(auction), auction)
         
-        return unique_auctions[:20]  # Return top 20
+        return list(unique_auctions.values())[:20]  # Return top 20
     
     def _get_sample_auctions(self) -> List[Dict[str, Any]]:
         """Return sample auction data when eBay is unavailable"""
-        return [
-            {
-                'id': 'sample1',
-                'title': 'IBM ThinkPad T42 - Vintage Laptop - Working',
-                'current_price': '45.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=thinkpad+t42',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '2h 30m',
-                'source': 'ebay_sample'
-            },
-            {
-                'id': 'sample2',
-                'title': 'Nintendo 64 Console + Controller - Tested',
-                'current_price': '65.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=nintendo+64',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '4h 15m',
-                'source': 'ebay_sample'
-            },
-            {
-                'id': 'sample3',
-                'title': 'Vintage Apple PowerBook G4 - For Parts/Repair',
-                'current_price': '30.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=powerbook+g4',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '6h 45m',
-                'source': 'ebay_sample'
-            },
-            {
-                'id': 'sample4',
-                'title': 'Sega Genesis Model 1 Console Bundle',
-                'current_price': '55.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=sega+genesis',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '8h 20m',
-                'source': 'ebay_sample'
-            },
-            {
-                'id': 'sample5',
-                'title': 'Dell Latitude D630 - Retro Business Laptop',
-                'current_price': '35.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=dell+latitude+d630',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '12h 10m',
-                'source': 'ebay_sample'
-            },
-            {
-                'id': 'sample6',
-                'title': 'Sony PlayStation 2 Slim - Works Great',
-                'current_price': '40.00',
-                'link': 'https://www.ebay.com/sch/i.html?_nkw=ps2+slim',
-                'image_url': 'https://i.ebayimg.com/images/g/example/s-l300.jpg',
-                'time_left': '1d 2h',
-                'source': 'ebay_sample'
-            },
-        ]
+        return [dict(auction) for auction in _SAMPLE_AUCTIONS]
+
+
+# Singleton instance
+_collector: Optional[EBayAuctionCollector] = None
+
+def get_ebay_auction_collector() -> EBayAuctionCollector:
+    """Get the eBay auction collector singleton"""
+    global _collector
+    if _collector is None:
+        _collector = EBayAuctionCollector()
+    return _collector
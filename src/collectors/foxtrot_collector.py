@@ -8,17 +8,25 @@ Fetches FoxTrot comics from GoComics.com
 """
 
 import os
-import json
+import html
+import orjson
 import requests
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; scanned against the raw response bytes
+_FEATUREASSETS_RE = re.compile(rb'https://featureassets\.gocomics\.com/assets/[a-f0-9]+')
+_OG_TITLE_RE = re.compile(rb'<meta property="og:title" content="([^"]+)"')
+_CANONICAL_RE = re.compile(rb'<link rel="canonical" href="([^"]+)"')
+
 class FoxTrotCollector:
     """Collector for FoxTrot comics from GoComics."""
     
@@ -38,62 +46,97 @@ class FoxTrotCollector:
             self.cache_dir = project_root / "data" / "comics" / "foxtrot"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_file = project_root / "data" / "foxtrot_archive.json"
+        # One pooled session so repeated page/image fetches reuse connections
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=3)
+        self.session.mount("https://", adapter)
         self._load_cache()
     
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
     def _load_cache(self):
         """Load cached comic metadata."""
         if self.cache_file.exists():
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
+            with open(self.cache_file, 'rb') as f:
+                self.cache = orjson.loads(f.read())
         else:
             self.cache = {"comics": [], "last_updated": None}
+        # Support both 'id' and 'date' keys for backwards compatibility
+        self._id_index = {c.get('id') or c.get('date') for c in self.cache.get('comics', [])}
     
     def _save_cache(self):
         """Save comic metadata to cache."""
         self.cache["last_updated"] = datetime.now().isoformat()
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+        with open(self.cache_file, 'wb') as f:
+            f.write(orjson.dumps(self.cache, option=orjson.OPT_INDENT_2))
     
-    def _fetch_comic_page(self, url: str) -> Optional[Dict[str, Any]]:
-        """Fetch and parse a single comic page."""
+    def _fetch_comic_page(self, url: str, date: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a single comic page.
+        
+        When `date` is given and the page was served without a redirect, the
+        request URL is already canonical, so title and link are derived from it.
+        """
         try:
-            resp = requests.get(url, headers=self.HEADERS, timeout=15)
+            resp = self.session.get(url, timeout=15)
             if resp.status_code != 200:
                 logger.warning(f"Failed to fetch {url}: {resp.status_code}")
                 return None
             
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # First try to find the comic image from featureassets
+            content = resp.content
             image_url = None
+            title = None
+            link = None
             
-            # Look for featureassets URL in page content
-            featureassets_match = re.search(r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+', resp.text)
+            # Fast path: read everything straight from the raw bytes
+            featureassets_match = _FEATUREASSETS_RE.search(content)
             if featureassets_match:
-                image_url = featureassets_match.group(0)
+                image_url = featureassets_match.group(0).decode()
+                if date and not resp.history:
+                    comic_id = date.strftime("%Y-%m-%d")
+                    return {
+                        "id": comic_id,
+                        "series": "foxtrot",
+                        "title": f"FoxTrot - {comic_id}",
+                        "date": comic_id,
+                        "image_url": image_url,
+                        "link": url,
+                        "attribution": "© Bill Amend / GoComics"
+                    }
+                og_title_match = _OG_TITLE_RE.search(content)
+                canonical_match = _CANONICAL_RE.search(content)
+                if og_title_match and canonical_match:
+                    title = html.unescape(og_title_match.group(1).decode())
+                    link = html.unescape(canonical_match.group(1).decode())
             
-            # Fallback: try og:image meta tag
-            if not image_url:
-                og_image = soup.select_one('meta[property="og:image"]')
-                if og_image and og_image.get('content'):
-                    image_url = og_image['content']
-                    # Skip placeholder images
-                    if 'GC_Social' in image_url or 'staging-assets' in image_url:
-                        image_url = None
+            # Only build the DOM when the fast path came up short
+            if link is None:
+                soup = BeautifulSoup(resp.text, "lxml")
+                
+                # Fallback: try og:image meta tag
+                if not image_url:
+                    og_image = soup.select_one('meta[property="og:image"]')
+                    if og_image and og_image.get('content'):
+                        image_url = og_image['content']
+                        # Skip placeholder images
+                        if 'GC_Social' in image_url or 'staging-assets' in image_url:
+                            image_url = None
+                
+                # Get title
+                og_title = soup.select_one('meta[property="og:title"]')
+                title = og_title['content'] if og_title and og_title.get('content') else "FoxTrot"
+                
+                # Get canonical link
+                canonical = soup.find('link', rel='canonical')
+                link = canonical['href'] if canonical and canonical.get('href') else url
             
             # Check for challenge/block
             if not image_url or 'challenge.svg' in str(image_url):
                 logger.warning(f"Blocked or no image for {url}")
                 return None
             
-            # Get title
-            og_title = soup.select_one('meta[property="og:title"]')
-            title = og_title['content'] if og_title and og_title.get('content') else "FoxTrot"
-            
-            # Get canonical link
-            canonical = soup.find('link', rel='canonical')
-            link = canonical['href'] if canonical and canonical.get('href') else url
-            
             # Parse date from URL or canonical link
             parse_url = link if link else url
             parts = parse_url.rstrip('/').split('/')
@@ -146,25 +189,45 @@ class FoxTrotCollector:
         
         return {"success": False, "error": "Failed to fetch FoxTrot comic"}
     
-    def _add_to_cache(self, comic: Dict[str, Any]):
-        """Add comic to cache if not already present."""
-        existing_ids = {c['id'] for c in self.cache.get('comics', [])}
-        if comic['id'] not in existing_ids:
-            self.cache['comics'].append(comic)
+    def _add_to_cache(self, comic: Dict[str, Any], flush: bool = True) -> bool:
+        """Add comic to cache if not already present.
+        
+        Batch callers pass flush=False and call _save_cache() once when done.
+        Returns True if the comic was added.
+        """
+        if comic['id'] in self._id_index:
+            return False
+        self._id_index.add(comic['id'])
+        self.cache['comics'].append(comic)
+        if flush:
             self._save_cache()
+        return True
     
     def get_by_date(self, date: datetime) -> Optional[Dict[str, Any]]:
         """Get comic for a specific date."""
         url = f"{self.BASE_URL}/{date.year}/{date.month}/{date.day}"
-        return self._fetch_comic_page(url)
+        return self._fetch_comic_page(url, date)
+    
+    def get_range(self, dates: List[datetime], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """Fetch comics for several dates in parallel and cache them in one write."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            comics = [comic for comic in executor.map(self.get_by_date, dates) if comic]
+        
+        added = False
+        for comic in comics:
+            added |= self._add_to_cache(comic, flush=False)
+        if added:
+            self._save_cache()
+        return comics
     
     def download_image(self, image_url: str, comic_id: str) -> Optional[str]:
         """Download and cache comic image."""
         try:
+            path = urlparse(image_url).path.lower()
             ext = "gif"
-            if ".png" in image_url.lower():
+            if path.endswith(".png"):
                 ext = "png"
-            elif ".jpg" in image_url.lower() or ".jpeg" in image_url.lower():
+            elif path.endswith((".jpg", ".jpeg")):
                 ext = "jpg"
             
             filename = f"{comic_id}.{ext}"
@@ -173,15 +236,18 @@ class FoxTrotCollector:
             if filepath.exists():
                 return str(filepath)
             
-            resp = requests.get(image_url, headers=self.HEADERS, timeout=30)
-            if resp.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(resp.content)
-                logger.info(f"Downloaded FoxTrot: {filename}")
-                return str(filepath)
-            else:
-                logger.warning(f"Failed to download {image_url}: {resp.status_code}")
-                return None
+            # Stream to a temp file so a failed download never leaves a partial image
+            tmp_path = filepath.with_name(filename + ".part")
+            with self.session.get(image_url, stream=True, timeout=30) as resp:
+                if resp.status_code != 200:
+                    logger.warning(f"Failed to download {image_url}: {resp.status_code}")
+                    return None
+                with open(tmp_path, 'wb') as f:
+                    for chunk in resp.iter_content(65536):
+                        f.write(chunk)
+            os.replace(tmp_path, filepath)
+            logger.info(f"Downloaded FoxTrot: {filename}")
+            return str(filepath)
         except Exception as e:
             logger.error(f"Error downloading {image_url}: {e}")
             return None
@@ -204,21 +270,24 @@ class FoxTrotCollector:
     
     def _scan_directory_for_archive(self):
         """Scan the comics directory and add any missing files to the cache."""
-        # Support both 'id' and 'date' keys for backwards compatibility
-        existing_ids = {c.get('id') or c.get('date') for c in self.cache.get('comics', [])}
-        
-        for filepath in self.cache_dir.glob("*.gif"):
-            comic_id = filepath.stem  # e.g., "2025-12-21"
-            if comic_id not in existing_ids:
+        added = False
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".gif"):
+                    continue
+                comic_id = entry.name[:-4]  # e.g., "2025-12-21"
+                if comic_id in self._id_index:
+                    continue
                 # Add to cache with local file reference
-                self.cache['comics'].append({
+                added |= self._add_to_cache({
                     "id": comic_id,
                     "series": "foxtrot",
                     "title": f"FoxTrot - {comic_id}",
                     "date": comic_id,
-                    "image_url": f"/data/comics/foxtrot/{filepath.name}",
+                    "image_url": f"/data/comics/foxtrot/{entry.name}",
                     "link": f"https://www.gocomics.com/foxtrot/{comic_id.replace('-', '/')}",
                     "attribution": "© Bill Amend / GoComics"
-                })
+                }, flush=False)
         
-        self._save_cache()
+        if added:
+            self._save_cache()
@@ -1,13 +1,20 @@
 """iCloud Family Calendar Collector"""
+import time
 import httpx
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
 from icalendar import Calendar
-from dateutil.parser import parse as parse_date
+
+from .base_collector import get_shared_client
 
 logger = logging.getLogger(__name__)
 
+_CLIENT_KWARGS = dict(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+)
 
 class ICloudCalendarCollector:
     """Collector for iCloud Family Calendar via webcal URL"""
@@ -21,15 +28,42 @@ class ICloudCalendarCollector:
         """
         self.webcal_url = webcal_url.replace('webcal://', 'https://')
         self.timeout = 10
+        # (fetched_at, calendar) from the last successful fetch
+        self._ttl = 60
+        self._cache: Optional[Tuple[float, Calendar]] = None
+        self._validators: Dict[str, str] = {}
+        self._ics_hash: Optional[int] = None
+        # days_ahead -> (calendar, computed_at, events)
+        self._events_cache: Dict[int, Tuple[Calendar, float, List[Dict[str, Any]]]] = {}
     
     async def fetch_calendar(self) -> Optional[Calendar]:
-        """Fetch calendar data from iCloud"""
+        """Fetch calendar data from iCloud, reusing it for up to _ttl seconds"""
+        if self._cache and time.monotonic() - self._cache[0] < self._ttl:
+            return self._cache[1]
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.webcal_url)
-                response.raise_for_status()
+            # Revalidate cheaply once the TTL has expired
+            headers = self._validators if self._cache else {}
+            response = await get_shared_client("icloud_calendar", **_CLIENT_KWARGS).get(self.webcal_url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and self._cache:
+                self._cache = (time.monotonic(), self._cache[1])
+                return self._cache[1]
+            response.raise_for_status()
+            # Unchanged bytes keep the same Calendar object, so cached events stay valid
+            ics_hash = hash(response.content)
+            if self._cache and ics_hash == self._ics_hash:
+                cal = self._cache[1]
+            else:
                 cal = Calendar.from_ical(response.content)
-                return cal
+                self._ics_hash = ics_hash
+            
+            self._validators = {}
+            if response.headers.get('etag'):
+                self._validators['If-None-Match'] = response.headers['etag']
+            if response.headers.get('last-modified'):
+                self._validators['If-Modified-Since'] = response.headers['last-modified']
+            self._cache = (time.monotonic(), cal)
+            return cal
         except Exception as e:
             logger.error(f"Error fetching iCloud calendar: {e}")
             return None
@@ -48,48 +82,66 @@ class ICloudCalendarCollector:
         if not cal:
             return []
         
+        # Reuse events built from this same calendar within the TTL
+        cached = self._events_cache.get(days_ahead)
+        if cached and cached[0] is cal and time.monotonic() - cached[1] < self._ttl:
+            return list(cached[2])
+        
         events = []
-        now = datetime.now()
+        now = datetime.now(timezone.utc)
         cutoff = now + timedelta(days=days_ahead)
         
         try:
-            for component in cal.walk():
-                if component.name == "VEVENT":
-                    try:
-                        event_dict = {
-                            'title': str(component.get('summary', 'Untitled')),
-                            'description': str(component.get('description', '')),
-                            'location': str(component.get('location', '')),
-                            'uid': str(component.get('uid', ''))
-                        }
-                        
-                        # Parse dates
-                        start = component.get('dtstart')
-                        if start:
-                            start_dt = start.dt if hasattr(start, 'dt') else start
-                            if isinstance(start_dt, datetime):
-                                if start_dt.tzinfo is None:
-                                    start_dt = start_dt.replace(tzinfo=None)
-                                else:
-                                    start_dt = start_dt.replace(tzinfo=None)
-                                
-                                if now <= start_dt <= cutoff:
-                                    event_dict['start_time'] = start_dt.isoformat()
-                                    
-                                    end = component.get('dtend')
-                                    if end:
-                                        end_dt = end.dt if hasattr(end, 'dt') else end
-                                        if isinstance(end_dt, datetime):
-                                            end_dt = end_dt.replace(tzinfo=None)
-                                            event_dict['end_time'] = end_dt.isoformat()
-                                    
-                                    events.append(event_dict)
-                    except Exception as e:
-                        logger.debug(f"Error parsing event: {e}")
+            for component in cal.walk("VEVENT"):
+                try:
+                    # Check the date window first; only in-window events get a dict
+                    start = component.get('dtstart')
+                    if not start:
+                        continue
+                    start_dt = start.dt if hasattr(start, 'dt') else start
+                    if not isinstance(start_dt, datetime):
                         continue
+                    # Compare as UTC instants; floating (naive) times are taken as local time
+                    start_dt = start_dt.astimezone(timezone.utc)
+                    if not now <= start_dt <= cutoff:
+                        continue
+                    
+                    event_dict = {
+                        'title': str(component.get('summary', 'Untitled')),
+                        'description': str(component.get('description', '')),
+                        'location': str(component.get('location', '')),
+                        'uid': str(component.get('uid', '')),
+                        'start_time': start_dt.isoformat()
+                    }
+                    
+                    end = component.get('dtend')
+                    if end:
+                        end_dt = end.dt if hasattr(end, 'dt') else end
+                        if isinstance(end_dt, datetime):
+                            end_dt = end_dt.astimezone(timezone.utc)
+                            event_dict['end_time'] = end_dt.isoformat()
+                    
+                    events.append(event_dict)
+                except Exception as e:
+                    logger.debug(f"Error parsing event: {e}")
+                    continue
         except Exception as e:
             logger.error(f"Error walking calendar: {e}")
         
-        # Sort by start time
+        # Sort by start time (all UTC, so ISO strings order correctly)
         events.sort(key=lambda x: x.get('start_time', ''))
-        return events[:20]  # Return first 20 events
+        events = events[:20]  # Return first 20 events
+        self._events_cache[days_ahead] = (cal, time.monotonic(), events)
+        return list(events)
+
+
+# Singleton instance
+_collector: Optional[ICloudCalendarCollector] = None
+
+def get_icloud_calendar_collector(webcal_url: str) -> ICloudCalendarCollector:
+    """Get the iCloud calendar collector singleton, rebuilding it if the URL changes"""
+    global _collector
+    url = webcal_url.replace('webcal://', 'https://')
+    if _collector is None or _collector.webcal_url != url:
+        _collector = ICloudCalendarCollector(webcal_url)
+    return _collector
@@ -4,11 +4,15 @@ Fetches music data from Last.fm for the Demon theme music player
 """
 
 import os
+import time
+import asyncio
 import logging
 import httpx
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from .base_collector import get_shared_client
+
 logger = logging.getLogger(__name__)
 
 # Last.fm API base URL
@@ -27,6 +31,12 @@ STATION_TAGS = {
     "trip_hop": "trip-hop"
 }
 
+_CLIENT_KWARGS = dict(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+)
+
 
 def _get_lastfm_credentials() -> Dict[str, str]:
     """Get Last.fm credentials from app_config, falling back to credentials table or environment."""
@@ -61,6 +71,10 @@ def _get_lastfm_credentials() -> Dict[str, str]:
 class LastFMCollector:
     """Collector for Last.fm music data"""
     
+    # Tag/artist data changes slowly; repeat calls within this window reuse the response
+    CACHE_TTL = 300
+    CACHE_MAX_ENTRIES = 128
+    
     def __init__(self):
         creds = _get_lastfm_credentials()
         self.api_key = creds.get('api_key', '')
@@ -71,12 +85,47 @@ class LastFMCollector:
             logger.warning("Last.fm API key not configured - features will be limited")
         else:
             logger.info(f"Last.fm collector initialized for user: {self.username}")
+        
+        self._cache: Dict[tuple, Tuple[float, Dict]] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
     
     async def _make_request(self, method: str, params: Dict[str, str]) -> Optional[Dict]:
-        """Make an async request to Last.fm API"""
+        """Make an async request to Last.fm API
+        
+        Responses are cached for CACHE_TTL seconds, and concurrent identical
+        requests share a single round-trip.
+        """
         if not self.api_key:
             return None
-            
+        
+        key = (method, frozenset(params.items()))
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.CACHE_TTL:
+            return cached[1]
+        
+        inflight = self._inflight.get(key)
+        if inflight:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._fetch(method, params)
+            if data is not None:
+                self._cache.pop(key, None)
+                self._cache[key] = (time.monotonic(), data)
+                if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    del self._cache[next(iter(self._cache))]
+            future.set_result(data)
+            return data
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.set_result(None)
+    
+    async def _fetch(self, method: str, params: Dict[str, str]) -> Optional[Dict]:
+        """Send one request to the Last.fm API"""
         params.update({
             'method': method,
             'api_key': self.api_key,
@@ -84,10 +133,9 @@ class LastFMCollector:
         })
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(LASTFM_API_BASE, params=params)
-                response.raise_for_status()
-                return response.json()
+            response = await get_shared_client("lastfm", **_CLIENT_KWARGS).get(LASTFM_API_BASE, params=params)
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             logger.error(f"Last.fm API error: {e}")
             return None
@@ -181,8 +229,11 @@ class LastFMCollector:
         """Get data for a music station (tag-based)"""
         tag = STATION_TAGS.get(station_id, station_id)
         
-        tracks = await self.get_top_tracks_by_tag(tag, limit=10)
-        artists = await self.get_top_artists_by_tag(tag, limit=5)
+        # Independent requests; run them concurrently
+        tracks, artists = await asyncio.gather(
+            self.get_top_tracks_by_tag(tag, limit=10),
+            self.get_top_artists_by_tag(tag, limit=5)
+        )
         
         return {
             'station_id': station_id,
@@ -219,17 +270,17 @@ class LastFMCollector:
         if not images:
             return ''
         
-        # Try to get requested size, fall back to any available
+        # Single pass: return the requested size as soon as it appears,
+        # otherwise fall back to the last (usually largest) image
+        chosen = ''
         for img in images:
-            if img.get('size') == size and img.get('#text'):
-                return img['#text']
-        
-        # Fall back to last (usually largest) image
-        for img in reversed(images):
-            if img.get('#text'):
-                return img['#text']
-        
-        return ''
+            url = img.get('#text')
+            if not url:
+                continue
+            if img.get('size') == size:
+                return url
+            chosen = url
+        return chosen
 
 
 # Singleton instance
@@ -1,5 +1,7 @@
 """Peanuts daily comic collector (GoComics)"""
 import asyncio
+import html
+import os
 import httpx
 from bs4 import BeautifulSoup
 from datetime import datetime
@@ -7,8 +9,22 @@ from pathlib import Path
 import re
 from typing import Optional, Dict, Any
 
+from .base_collector import get_shared_client
+
+# Scanned against the raw response bytes: <img> tags served from featureassets, and their srcset
+_FEATUREASSETS_IMG_RE = re.compile(rb'<img\b[^>]*\bsrc="https://featureassets\.gocomics\.com/[^"]*"[^>]*>')
+_SRCSET_ATTR_RE = re.compile(rb'\bsrcset="([^"]*)"')
+_FEATUREASSETS_RE = re.compile(rb'https://featureassets\.gocomics\.com/assets/[a-f0-9]+\?[^"\s>]+')
+
 UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Safari/537.36'
 
+_CLIENT_KWARGS = dict(
+    http2=True,
+    timeout=15,
+    headers={'User-Agent': UA, 'Accept-Language': 'en-US,en;q=0.9'},
+    limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+)
+
 class PeanutsCollector:
     """Fetches Peanuts daily comic image from gocomics.com."""
 
@@ -19,8 +35,18 @@ class PeanutsCollector:
         d = date or datetime.now()
         return f"https://www.gocomics.com/peanuts/{d.year:04d}/{d.month:02d}/{d.day:02d}"
 
-    def _extract_image_url(self, html: str) -> Optional[str]:
-        soup = BeautifulSoup(html, 'html.parser')
+    def _extract_image_url(self, content: bytes) -> Optional[str]:
+        # Fast path: when exactly one featureassets <img> is on the page it is the
+        # comic, so take its srcset without building a DOM; otherwise let the DOM decide
+        imgs = _FEATUREASSETS_IMG_RE.findall(content)
+        if len(imgs) == 1:
+            m = _SRCSET_ATTR_RE.search(imgs[0])
+            if m and b'featureassets.gocomics.com' in m.group(1):
+                parts = [p.strip() for p in html.unescape(m.group(1).decode()).split(',') if p.strip()]
+                if parts:
+                    return parts[-1].split(' ')[0]
+        text = content.decode('utf-8', errors='replace')
+        soup = BeautifulSoup(text, 'lxml')
         # Prefer images hosted on featureassets.gocomics.com
         # Try common patterns on GC comic pages
         # 1) Look for img with srcset containing featureassets
@@ -40,27 +66,27 @@ class PeanutsCollector:
             if src and 'featureassets.gocomics.com' in src:
                 return src
         # Regex fallback in entire HTML
-        m = re.search(r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+\?[^"\s>]+', html)
+        m = _FEATUREASSETS_RE.search(content)
         if m:
-            return m.group(0)
+            return html.unescape(m.group(0).decode())
         return None
 
     async def get_comic(self, date: Optional[datetime] = None, save: bool = False) -> Dict[str, Any]:
         url = self._build_url(date)
-        async with httpx.AsyncClient(timeout=self.timeout, headers={'User-Agent': UA, 'Accept-Language': 'en-US,en;q=0.9'}) as client:
-            r = await client.get(url, follow_redirects=True)
-            r.raise_for_status()
-            image_url = self._extract_image_url(r.text)
-            result = {
-                'success': bool(image_url),
-                'date': (date or datetime.now()).strftime('%Y-%m-%d'),
-                'page_url': url,
-                'image_url': image_url
-            }
-            if save and image_url:
-                await self._save_image(client, image_url, result['date'])
-                result['saved'] = True
-            return result
+        client = get_shared_client("peanuts", **_CLIENT_KWARGS)
+        r = await client.get(url, timeout=self.timeout, follow_redirects=True)
+        r.raise_for_status()
+        image_url = self._extract_image_url(r.content)
+        result = {
+            'success': bool(image_url),
+            'date': (date or datetime.now()).strftime('%Y-%m-%d'),
+            'page_url': url,
+            'image_url': image_url
+        }
+        if save and image_url:
+            await self._save_image(client, image_url, result['date'])
+            result['saved'] = True
+        return result
 
     async def _save_image(self, client: httpx.AsyncClient, image_url: str, date_str: str) -> None:
         data_dir = Path('data/peanuts')
@@ -70,9 +96,13 @@ class PeanutsCollector:
         if '.png' in image_url:
             ext = '.png'
         out = data_dir / f'{date_str}{ext}'
-        resp = await client.get(image_url)
-        resp.raise_for_status()
-        out.write_bytes(resp.content)
+        tmp = out.with_name(out.name + '.part')
+        async with client.stream('GET', image_url, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            with open(tmp, 'wb') as f:
+                async for chunk in resp.aiter_bytes(65536):
+                    f.write(chunk)
+        os.replace(tmp, out)
 
 if __name__ == '__main__':
     async def _test():
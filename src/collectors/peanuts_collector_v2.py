@@ -8,17 +8,35 @@ Fetches Peanuts comics from GoComics.com
 """
 
 import os
-import json
+import html
+import orjson
+import shutil
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import re
+import bisect
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
+from random import randrange
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+# Scanned against the raw response bytes; the DOM is only built if a meta tag is missing
+_FEATUREASSETS_RE = re.compile(rb'https://featureassets\.gocomics\.com/assets/[a-f0-9]+')
+_OG_IMAGE_RE = re.compile(rb'<meta property="og:image" content="([^"]+)"')
+_OG_TITLE_RE = re.compile(rb'<meta property="og:title" content="([^"]+)"')
+_CANONICAL_RE = re.compile(rb'<link rel="canonical" href="([^"]+)"')
+_DATE_IN_URL_RE = re.compile(r'/(\d{4})/(\d{1,2})/(\d{1,2})/?$')
+
 class PeanutsCollectorV2:
     """Collector for Peanuts comics from GoComics."""
     
@@ -28,6 +46,7 @@ class PeanutsCollectorV2:
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.5"
     }
+    BACKFILL_CONCURRENCY = 16
     
     def __init__(self, cache_dir: str = None):
         # Use absolute paths based on project root
@@ -37,92 +56,193 @@ class PeanutsCollectorV2:
         else:
             self.cache_dir = project_root / "data" / "comics" / "peanuts"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # One pooled session so repeated page/image fetches reuse connections
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        self.session.mount("https://", adapter)
         self.cache_file = project_root / "data" / "peanuts_archive.json"
+        # New comics are appended here one per line; folded into cache_file by compact()
+        self.journal_file = project_root / "data" / "peanuts_archive.jsonl"
         self._load_cache()
     
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
     def _load_cache(self):
         """Load cached comic metadata."""
         if self.cache_file.exists():
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
+            with open(self.cache_file, 'rb') as f:
+                self.cache = orjson.loads(f.read())
         else:
             self.cache = {"comics": [], "last_updated": None}
+        # Kept in ascending date order so the newest comics are at the end
+        self.cache.setdefault('comics', []).sort(key=itemgetter('date'))
+        # id -> comic entry; supports both 'id' and 'date' keys for backwards compatibility
+        self._id_index = {c.get('id') or c.get('date'): c for c in self.cache['comics']}
+        
+        # Replay comics added since the last compaction
+        if self.journal_file.exists():
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._append_comic(orjson.loads(line))
+                    except (orjson.JSONDecodeError, KeyError, TypeError):
+                        # A crash mid-append leaves a torn last line; compact() drops it
+                        logger.warning(f"Skipping unreadable journal entry in {self.journal_file}")
+            self.compact()
     
     def _save_cache(self):
-        """Save comic metadata to cache."""
+        """Save comic metadata to cache.
+        
+        The full file includes every journaled comic, so the journal is cleared.
+        """
         self.cache["last_updated"] = datetime.now().isoformat()
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+        # Serialize first so the file gets one write instead of one per token
+        data = orjson.dumps(self.cache, option=orjson.OPT_APPEND_NEWLINE)
+        # Swap the file in atomically; the journal is only dropped once the new archive is in place
+        tmp_file = self.cache_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, self.cache_file)
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+    
+    def compact(self):
+        """Merge the journal into the archive file."""
+        self._save_cache()
+    
+    def _append_comic(self, comic: Dict[str, Any]) -> bool:
+        """Add comic to the in-memory cache; returns False if already present."""
+        if comic['id'] in self._id_index:
+            return False
+        self._id_index[comic['id']] = comic
+        bisect.insort(self.cache['comics'], comic, key=itemgetter('date'))
+        return True
     
-    def _fetch_comic_page(self, url: str) -> Optional[Dict[str, Any]]:
-        """Fetch and parse a single comic page."""
+    def _fetch_comic_page(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a single comic page.
+        
+        If `cached` carries an ETag/Last-Modified from an earlier fetch, the
+        request is conditional and a 304 returns `cached` without parsing.
+        """
         try:
-            resp = requests.get(url, headers=self.HEADERS, timeout=15)
+            headers = {}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+            resp = self.session.get(url, headers=headers, timeout=15)
+            if resp.status_code == 304 and cached:
+                return cached
             if resp.status_code != 200:
                 logger.warning(f"Failed to fetch {url}: {resp.status_code}")
                 return None
             
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # First try to find the comic image from featureassets
-            image_url = None
-            
-            # Look for featureassets URL in page content
-            featureassets_match = re.search(r'https://featureassets\.gocomics\.com/assets/[a-f0-9]+', resp.text)
-            if featureassets_match:
-                image_url = featureassets_match.group(0)
-            
-            # Fallback: try og:image meta tag
-            if not image_url:
+            comic = self._parse_comic_page(url, resp.content)
+            if comic:
+                if resp.headers.get('ETag'):
+                    comic['etag'] = resp.headers['ETag']
+                if resp.headers.get('Last-Modified'):
+                    comic['last_modified'] = resp.headers['Last-Modified']
+            return comic
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+    
+    async def _fetch_comic_page_async(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, Any]]:
+        """Async variant of _fetch_comic_page for backfills."""
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                if resp.status != 200:
+                    logger.warning(f"Failed to fetch {url}: {resp.status}")
+                    return None
+                content = await resp.read()
+            return self._parse_comic_page(url, content)
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+    
+    def _parse_comic_page(self, url: str, content: bytes) -> Optional[Dict[str, Any]]:
+        """Extract comic metadata from a fetched page."""
+        # First try to find the comic image from featureassets
+        image_url = None
+        
+        # Look for featureassets URL in page content
+        featureassets_match = _FEATUREASSETS_RE.search(content)
+        if featureassets_match:
+            image_url = featureassets_match.group(0).decode('ascii')
+        
+        og_image_match = None if image_url else _OG_IMAGE_RE.search(content)
+        og_title_match = _OG_TITLE_RE.search(content)
+        canonical_match = _CANONICAL_RE.search(content)
+        soup = None
+        if not ((image_url or og_image_match) and og_title_match and canonical_match):
+            soup = BeautifulSoup(content, "lxml")
+        
+        # Fallback: try og:image meta tag
+        if not image_url:
+            if og_image_match:
+                image_url = html.unescape(og_image_match.group(1).decode())
+            else:
                 og_image = soup.select_one('meta[property="og:image"]')
                 if og_image and og_image.get('content'):
                     image_url = og_image['content']
-                    # Skip placeholder images
-                    if 'GC_Social' in image_url or 'staging-assets' in image_url:
-                        image_url = None
-            
-            # Check for challenge/block
-            if not image_url or 'challenge.svg' in str(image_url):
-                logger.warning(f"Blocked or no image for {url}")
-                return None
-            
-            # Get title
+            # Skip placeholder images
+            if image_url and ('GC_Social' in image_url or 'staging-assets' in image_url):
+                image_url = None
+        
+        # Check for challenge/block
+        if not image_url or 'challenge.svg' in str(image_url):
+            logger.warning(f"Blocked or no image for {url}")
+            return None
+        
+        # Get title
+        if og_title_match:
+            title = html.unescape(og_title_match.group(1).decode())
+        else:
             og_title = soup.select_one('meta[property="og:title"]')
             title = og_title['content'] if og_title and og_title.get('content') else "Peanuts"
-            
-            # Get canonical link
+        
+        # Get canonical link
+        if canonical_match:
+            link = html.unescape(canonical_match.group(1).decode())
+        else:
             canonical = soup.find('link', rel='canonical')
             link = canonical['href'] if canonical and canonical.get('href') else url
-            
-            # Parse date from URL or canonical link
-            parse_url = link if link else url
-            parts = parse_url.rstrip('/').split('/')
+        
+        # Parse date from URL or canonical link
+        parse_url = link if link else url
+        date_match = _DATE_IN_URL_RE.search(parse_url)
+        if date_match:
+            comic_id = f"{date_match[1]}-{date_match[2].zfill(2)}-{date_match[3].zfill(2)}"
+        else:
             comic_id = datetime.now().strftime("%Y-%m-%d")
-            if len(parts) >= 3:
-                try:
-                    y, m, d = parts[-3], parts[-2], parts[-1]
-                    if y.isdigit() and len(y) == 4:
-                        comic_id = f"{y}-{m.zfill(2)}-{d.zfill(2)}"
-                except:
-                    pass
-            
-            return {
-                "id": comic_id,
-                "series": "peanuts",
-                "title": title,
-                "date": comic_id,
-                "image_url": image_url,
-                "link": link,
-                "attribution": "© Peanuts Worldwide / GoComics"
-            }
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+        
+        return {
+            "id": comic_id,
+            "series": "peanuts",
+            "title": title,
+            "date": comic_id,
+            "image_url": image_url,
+            "link": link,
+            "attribution": "© Peanuts Worldwide / GoComics"
+        }
     
     def get_daily(self) -> Dict[str, Any]:
         """Get today's Peanuts comic and cache it."""
         # Use today's date in URL format to get actual comic
         today = datetime.now()
+        # Already have today's comic: no request needed
+        cached = self._id_index.get(today.strftime("%Y-%m-%d"))
+        if cached:
+            return {"success": True, "comic": cached}
         comic = self.get_by_date(today)
         if comic:
             # Add to cache if not already there
@@ -130,6 +250,9 @@ class PeanutsCollectorV2:
             return {"success": True, "comic": comic}
         # Try yesterday if today's not available yet
         yesterday = today - timedelta(days=1)
+        cached = self._id_index.get(yesterday.strftime("%Y-%m-%d"))
+        if cached:
+            return {"success": True, "comic": cached}
         comic = self.get_by_date(yesterday)
         if comic:
             self._add_to_cache(comic)
@@ -137,16 +260,32 @@ class PeanutsCollectorV2:
         return {"success": False, "error": "Failed to fetch daily comic"}
     
     def _add_to_cache(self, comic: Dict[str, Any]):
-        """Add comic to cache if not already present."""
-        existing_ids = {c['id'] for c in self.cache.get('comics', [])}
-        if comic['id'] not in existing_ids:
-            self.cache['comics'].append(comic)
-            self._save_cache()
+        """Add comic to cache if not already present, appending it to the journal."""
+        if self._append_comic(comic):
+            with open(self.journal_file, 'ab') as f:
+                f.write(orjson.dumps(comic, option=orjson.OPT_APPEND_NEWLINE))
     
     def get_by_date(self, date: datetime) -> Optional[Dict[str, Any]]:
         """Get comic for a specific date."""
         url = f"{self.BASE_URL}/{date.year}/{date.month}/{date.day}"
-        return self._fetch_comic_page(url)
+        return self._fetch_comic_page(url, self._id_index.get(date.strftime("%Y-%m-%d")))
+    
+    async def backfill(self, dates: List[datetime]) -> List[Dict[str, Any]]:
+        """Fetch comics for many dates concurrently and add them to the cache."""
+        semaphore = asyncio.Semaphore(self.BACKFILL_CONCURRENCY)
+        
+        async def fetch(session: aiohttp.ClientSession, date: datetime):
+            async with semaphore:
+                url = f"{self.BASE_URL}/{date.year}/{date.month}/{date.day}"
+                return await self._fetch_comic_page_async(session, url)
+        
+        async with aiohttp.ClientSession(headers=self.HEADERS) as session:
+            results = await asyncio.gather(*(fetch(session, date) for date in dates))
+        
+        comics = [comic for comic in results if comic]
+        for comic in comics:
+            self._add_to_cache(comic)
+        return comics
     
     def download_image(self, image_url: str, comic_id: str) -> Optional[str]:
         """Download and cache comic image."""
@@ -163,52 +302,66 @@ class PeanutsCollectorV2:
             if filepath.exists():
                 return str(filepath)
             
-            resp = requests.get(image_url, headers=self.HEADERS, timeout=30)
-            if resp.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(resp.content)
-                logger.info(f"Downloaded: {filename}")
-                return str(filepath)
-            else:
-                logger.warning(f"Failed to download {image_url}: {resp.status_code}")
-                return None
+            # Stream to a temp file and rename so a failed download never leaves a partial image
+            tmp_path = filepath.with_suffix('.tmp')
+            with self.session.get(image_url, timeout=30, stream=True) as resp:
+                if resp.status_code != 200:
+                    logger.warning(f"Failed to download {image_url}: {resp.status_code}")
+                    return None
+                resp.raw.decode_content = True
+                with open(tmp_path, 'wb') as f:
+                    shutil.copyfileobj(resp.raw, f, length=65536)
+            os.replace(tmp_path, filepath)
+            logger.info(f"Downloaded: {filename}")
+            return str(filepath)
         except Exception as e:
             logger.error(f"Error downloading {image_url}: {e}")
             return None
     
+    def download_many(self, comics: List[Dict[str, Any]], max_workers: int = 8) -> List[Optional[str]]:
+        """Download images for several comics in parallel."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda c: self.download_image(c['image_url'], c['id']), comics))
+    
     def get_random(self) -> Dict[str, Any]:
         """Get a random comic from the cache or daily."""
-        import random
-        if not self.cache.get('comics'):
+        comics = self.cache.get('comics')
+        if not comics:
             return self.get_daily()
         
-        comic = random.choice(self.cache['comics'])
-        return {"success": True, "comic": comic}
+        return {"success": True, "comic": comics[randrange(len(comics))]}
     
     def get_archive_list(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get list of cached comics sorted by date."""
         # Scan directory for any downloaded images not in cache
         self._scan_directory_for_archive()
-        comics = sorted(self.cache.get('comics', []), key=lambda x: x['date'], reverse=True)
-        return comics[:limit]
+        # The list is kept sorted by date, so the newest are read off the end
+        return list(islice(reversed(self.cache['comics']), limit))
     
     def _scan_directory_for_archive(self):
         """Scan the comics directory and add any missing files to the cache."""
-        # Support both 'id' and 'date' keys for backwards compatibility
-        existing_ids = {c.get('id') or c.get('date') for c in self.cache.get('comics', [])}
-        
-        for filepath in self.cache_dir.glob("*.gif"):
-            comic_id = filepath.stem  # e.g., "2025-12-21"
-            if comic_id not in existing_ids:
-                # Add to cache with local file reference
-                self.cache['comics'].append({
-                    "id": comic_id,
-                    "series": "peanuts",
-                    "title": f"Peanuts - {comic_id}",
-                    "date": comic_id,
-                    "image_url": f"/data/comics/peanuts/{filepath.name}",
-                    "link": f"https://www.gocomics.com/peanuts/{comic_id.replace('-', '/')}",
-                    "attribution": "© Peanuts Worldwide / GoComics"
-                })
+        new_comics = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".gif"):
+                    continue
+                comic_id = entry.name[:-4]  # e.g., "2025-12-21"
+                if comic_id not in self._id_index:
+                    # Add to cache with local file reference
+                    new_comics.append({
+                        "id": comic_id,
+                        "series": "peanuts",
+                        "title": f"Peanuts - {comic_id}",
+                        "date": comic_id,
+                        "image_url": f"/data/comics/peanuts/{entry.name}",
+                        "link": f"https://www.gocomics.com/peanuts/{comic_id.replace('-', '/')}",
+                        "attribution": "© Peanuts Worldwide / GoComics"
+                    })
         
+        # Nothing new on disk: don't rewrite the archive
+        if not new_comics:
+            return
+        self._id_index.update((c['id'], c) for c in new_comics)
+        self.cache['comics'].extend(new_comics)
+        self.cache['comics'].sort(key=itemgetter('date'))
         self._save_cache()
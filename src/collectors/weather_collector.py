@@ -58,60 +58,81 @@ class WeatherCollector:
         self.lon = self.settings.weather.lon
         self.location_name = self.settings.weather.location
         self.units = self.settings.weather.units
+        
+        # Session created on first request and kept until close()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+    
+    async def close(self):
+        """Close the HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def is_configured(self) -> bool:
+        """True when a real OpenWeatherMap API key is set."""
+        return bool(self.api_key) and self.api_key != 'your_openweather_api_key'
     
     async def get_current_weather(self) -> Optional[WeatherData]:
-        """Get current weather data."""
-        if not self.api_key or self.api_key == 'your_openweather_api_key':
-            # Return mock data if no API key
-            return self._get_mock_weather()
+        """Get current weather data, or mock data when the API is not available."""
+        weather = await self.fetch_current_weather()
+        return weather if weather is not None else self._get_mock_weather()
+    
+    async def fetch_current_weather(self) -> Optional[WeatherData]:
+        """Get live current weather data, or None without an API key or on API errors."""
+        if not self.is_configured():
+            return None
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/weather"
-                params = {
-                    'lat': self.lat,
-                    'lon': self.lon,
-                    'appid': self.api_key,
-                    'units': self.units
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_weather_data(data)
-                    else:
-                        logger.warning(f"Weather API returned status {response.status}")
-                        return self._get_mock_weather()
-                        
+            url = f"{self.base_url}/weather"
+            params = {
+                'lat': self.lat,
+                'lon': self.lon,
+                'appid': self.api_key,
+                'units': self.units
+            }
+            
+            async with self._get_session().get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return self._parse_weather_data(data)
+                else:
+                    logger.warning(f"Weather API returned status {response.status}")
+                    return None
+                    
         except Exception as e:
             logger.warning(f"Failed to fetch weather data: {e}")
-            return self._get_mock_weather()
+            return None
     
     async def get_forecast(self, days: int = 5) -> list[ForecastData]:
         """Get weather forecast for the next few days."""
-        if not self.api_key or self.api_key == 'your_openweather_api_key':
+        if not self.is_configured():
             # Return mock data if no API key
             return self._get_mock_forecast()
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/forecast"
-                params = {
-                    'lat': self.lat,
-                    'lon': self.lon,
-                    'appid': self.api_key,
-                    'units': self.units,
-                    'cnt': days * 8  # 8 forecasts per day (every 3 hours)
-                }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_forecast_data(data)
-                    else:
-                        logger.warning(f"Forecast API returned status {response.status}")
-                        return self._get_mock_forecast()
-                        
+            url = f"{self.base_url}/forecast"
+            params = {
+                'lat': self.lat,
+                'lon': self.lon,
+                'appid': self.api_key,
+                'units': self.units,
+                'cnt': days * 8  # 8 forecasts per day (every 3 hours)
+            }
+            
+            async with self._get_session().get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return self._parse_forecast_data(data)
+                else:
+                    logger.warning(f"Forecast API returned status {response.status}")
+                    return self._get_mock_forecast()
+                    
         except Exception as e:
             logger.warning(f"Failed to fetch forecast data: {e}")
             return self._get_mock_forecast()
@@ -256,7 +277,7 @@ class WeatherCollector:
                 }
                 
                 # Add API status info
-                if not self.api_key or self.api_key == 'your_openweather_api_key':
+                if not self.is_configured():
                     result['api_status'] = 'mock_data'
                     result['setup_note'] = 'Get a free API key from https://openweathermap.org/api and set OPENWEATHER_API_KEY environment variable for real weather data'
                 else:
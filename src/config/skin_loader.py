@@ -3,13 +3,20 @@ Skin Loader Module
 Manages dashboard skins/themes with runtime switching support.
 """
 
-import json
 import logging
 import os
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from random import randrange
+from typing import Dict, Any, Optional, List, Tuple
+import orjson
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
 # Default skin if none specified
@@ -26,10 +33,10 @@ SKINS_DIR = _DOCKER_SKINS_PATH if _DOCKER_SKINS_PATH.exists() else _LOCAL_SKINS_
 class Skin:
     """Represents a loaded skin configuration."""
     
-    def __init__(self, name: str, config: Dict[str, Any], quotes: Dict[str, Any]):
+    def __init__(self, name: str, config: Dict[str, Any], quotes_path: Optional[Path] = None):
         self.name = name
         self.config = config
-        self.quotes = quotes
+        self._quotes_path = quotes_path
         
         # Extract commonly used values
         self.identity = config.get("identity", {})
@@ -40,6 +47,30 @@ class Skin:
         self.navigation = config.get("navigation", [])
         self.features = config.get("features", {})
         self.ai_personality = config.get("ai_personality", {})
+        
+        # Skins are not mutated after loading (a reload builds a new Skin),
+        # so derived values are computed once here
+        self._css_variables = {
+            f"--skin-{key.replace('_', '-')}": value for key, value in self.colors.items()
+        }
+        self._css_string = ":root {\n" + "\n".join(
+            f"  {k}: {v};" for k, v in self._css_variables.items()
+        ) + "\n}"
+        self._enabled_widgets = [
+            name for name, widget_config in self.get_widgets().items()
+            if isinstance(widget_config, dict) and widget_config.get("enabled", False)
+        ]
+    
+    @cached_property
+    def quotes(self) -> Dict[str, Any]:
+        """Quotes from quotes.json, read on first access."""
+        if self._quotes_path and self._quotes_path.exists():
+            try:
+                with open(self._quotes_path, 'rb') as f:
+                    return orjson.loads(f.read())
+            except Exception as e:
+                logger.error(f"Error loading quotes for skin {self.name}: {e}")
+        return {}
     
     @property
     def display_name(self) -> str:
@@ -63,24 +94,17 @@ class Skin:
     
     def get_css_variables(self) -> Dict[str, str]:
         """Generate CSS variables from color config."""
-        css_vars = {}
-        for key, value in self.colors.items():
-            css_key = f"--skin-{key.replace('_', '-')}"
-            css_vars[css_key] = value
-        return css_vars
+        return self._css_variables
     
     def get_css_string(self) -> str:
         """Generate CSS variable declarations as a string."""
-        vars_dict = self.get_css_variables()
-        lines = [f"  {k}: {v};" for k, v in vars_dict.items()]
-        return ":root {\n" + "\n".join(lines) + "\n}"
+        return self._css_string
     
     def get_random_quote(self, category: str = "random_quotes") -> str:
         """Get a random quote from the specified category."""
-        import random
-        quotes_list = self.quotes.get(category, [])
+        quotes_list = self.quotes.get(category)
         if quotes_list:
-            return random.choice(quotes_list)
+            return quotes_list[randrange(len(quotes_list))]
         return self.signature_phrase
     
     def get_widgets(self) -> Dict[str, Any]:
@@ -95,17 +119,16 @@ class Skin:
     
     def get_enabled_widgets(self) -> List[str]:
         """Get list of enabled widget names."""
-        widgets = self.get_widgets()
-        return [name for name, config in widgets.items() 
-                if isinstance(config, dict) and config.get("enabled", False)]
+        return self._enabled_widgets
     
     def get_widget_config(self, widget_name: str) -> Dict[str, Any]:
         """Get configuration for a specific widget."""
         widgets = self.get_widgets()
         return widgets.get(widget_name, {})
     
-    def to_json(self) -> Dict[str, Any]:
-        """Export skin data for frontend use."""
+    @cached_property
+    def _payload(self) -> Dict[str, Any]:
+        """Config-derived fields of to_json(); quotes are added per call so they stay lazy."""
         return {
             "name": self.name,
             "display_name": self.display_name,
@@ -120,9 +143,23 @@ class Skin:
             "backgrounds": self.backgrounds,
             "navigation": self.navigation,
             "features": self.features,
-            "quotes": self.quotes,
             "ai_personality": self.ai_personality
         }
+    
+    @cached_property
+    def _payload_bytes(self) -> bytes:
+        return orjson.dumps(self.to_json())
+    
+    def to_json(self) -> Dict[str, Any]:
+        """Export skin data for frontend use.
+        
+        Returns a new dict on every call so callers can modify it freely.
+        """
+        return {**self._payload, "quotes": self.quotes}
+    
+    def to_json_bytes(self) -> bytes:
+        """to_json() serialized once, for writing straight into a response."""
+        return self._payload_bytes
 
 
 class SkinLoader:
@@ -133,6 +170,8 @@ class SkinLoader:
         self._skins_cache: Dict[str, Skin] = {}
         self._active_skin_name: str = DEFAULT_SKIN
         self._active_skin: Optional[Skin] = None
+        # (skin.yaml mtimes, result) from the last list_available_skins call
+        self._list_cache: Optional[Tuple[Dict[str, int], List[Dict[str, Any]]]] = None
         
         # Ensure skins directory exists
         self.skins_dir.mkdir(parents=True, exist_ok=True)
@@ -147,26 +186,36 @@ class SkinLoader:
             logger.warning(f"Skins directory does not exist: {self.skins_dir}")
             return skins
         
+        # Only re-parse when a skin.yaml was added, removed or modified
+        mtimes = {}
         for skin_dir in self.skins_dir.iterdir():
-            if skin_dir.is_dir():
-                skin_yaml = skin_dir / "skin.yaml"
-                if skin_yaml.exists():
-                    try:
-                        with open(skin_yaml, 'r') as f:
-                            config = yaml.safe_load(f)
-                        identity = config.get("identity", {})
-                        voice = config.get("voice", {})
-                        skins.append({
-                            "name": skin_dir.name,
-                            "display_name": identity.get("display_name", skin_dir.name.title()),
-                            "tagline": identity.get("tagline", ""),
-                            "avatar": identity.get("avatar", ""),
-                            "voice": voice
-                        })
-                    except Exception as e:
-                        logger.error(f"Error reading skin {skin_dir.name}: {e}")
+            try:
+                mtimes[skin_dir.name] = (skin_dir / "skin.yaml").stat().st_mtime_ns
+            except OSError:
+                continue
+        if self._list_cache and self._list_cache[0] == mtimes:
+            return list(self._list_cache[1])
+        
+        for name in mtimes:
+            skin_dir = self.skins_dir / name
+            skin_yaml = skin_dir / "skin.yaml"
+            try:
+                with open(skin_yaml, 'r') as f:
+                    config = yaml.load(f.read(), Loader=_YamlLoader)
+                identity = config.get("identity", {})
+                voice = config.get("voice", {})
+                skins.append({
+                    "name": skin_dir.name,
+                    "display_name": identity.get("display_name", skin_dir.name.title()),
+                    "tagline": identity.get("tagline", ""),
+                    "avatar": identity.get("avatar", ""),
+                    "voice": voice
+                })
+            except Exception as e:
+                logger.error(f"Error reading skin {skin_dir.name}: {e}")
         
-        return skins
+        self._list_cache = (mtimes, skins)
+        return list(skins)
     
     def load_skin(self, skin_name: str) -> Optional[Skin]:
         """Load a skin by name."""
@@ -191,15 +240,10 @@ class SkinLoader:
         try:
             # Load skin config
             with open(skin_yaml, 'r') as f:
-                config = yaml.safe_load(f)
-            
-            # Load quotes (optional)
-            quotes = {}
-            if quotes_json.exists():
-                with open(quotes_json, 'r') as f:
-                    quotes = json.load(f)
+                config = yaml.load(f.read(), Loader=_YamlLoader)
             
-            skin = Skin(skin_name, config, quotes)
+            # Quotes (optional) are loaded lazily on first use
+            skin = Skin(skin_name, config, quotes_json)
             self._skins_cache[skin_name] = skin
             
             logger.info(f"Loaded skin: {skin_name} ({skin.display_name})")
@@ -252,6 +296,7 @@ class SkinLoader:
         """Force reload all cached skins."""
         self._skins_cache.clear()
         self._active_skin = None
+        self._list_cache = None
 
 
 # Global skin loader instance
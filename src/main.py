@@ -5,7 +5,7 @@ Clean, minimal implementation focusing on core data sources
 """
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import json
@@ -616,7 +616,10 @@ class BackgroundDataManager:
             from config.settings import Settings
             settings = Settings()
             collector = WeatherCollector(settings)
-            return await collector.collect_data()
+            try:
+                return await collector.collect_data()
+            finally:
+                await collector.close()
         except Exception as e:
             logger.error(f"Weather collection error: {e}")
             return {"error": str(e), "current": {}}
@@ -1392,8 +1395,7 @@ async def update_ai_settings(settings: Dict[str, Any]):
                         provider_id = db.save_ai_provider(provider_name, 'ollama', config)
                         
                         # Clear ai_manager and register only this provider as default
-                        ai_manager.providers.clear()
-                        ai_manager.default_provider = None
+                        ai_manager.clear_providers()
                         ai_manager.register_provider(provider, is_default=True)
                         
                         logger.info(f"Created/updated Ollama provider: {provider_name} as default")
@@ -1423,8 +1425,7 @@ async def update_ai_settings(settings: Dict[str, Any]):
                             provider_id = db.save_ai_provider(provider_name, 'openai', config)
                             
                             # Clear ai_manager and register only this provider as default
-                            ai_manager.providers.clear()
-                            ai_manager.default_provider = None
+                            ai_manager.clear_providers()
                             ai_manager.register_provider(provider, is_default=True)
                             
                             logger.info(f"Created/updated OpenAI provider: {provider_name} as default")
@@ -1454,8 +1455,7 @@ async def update_ai_settings(settings: Dict[str, Any]):
                             provider_id = db.save_ai_provider(provider_name, 'gemini', config)
                             
                             # Clear ai_manager and register only this provider as default
-                            ai_manager.providers.clear()
-                            ai_manager.default_provider = None
+                            ai_manager.clear_providers()
                             ai_manager.register_provider(provider, is_default=True)
                             
                             logger.info(f"Created/updated Gemini provider: {provider_name} as default")
@@ -2241,10 +2241,11 @@ async def get_active_skin_config():
     try:
         skin = get_active_skin()
         if skin:
-            return {
-                "success": True,
-                "skin": skin.to_json()
-            }
+            # Skin JSON is serialized once per skin; splice it in rather than re-encoding
+            return Response(
+                content=b'{"success":true,"skin":' + skin.to_json_bytes() + b'}',
+                media_type="application/json"
+            )
         return {"success": False, "error": "No active skin found"}
     except Exception as e:
         logger.error(f"Error getting active skin: {e}")
@@ -2294,10 +2295,10 @@ async def get_skin_config(skin_name: str):
         loader = get_skin_loader()
         skin = loader.load_skin(skin_name)
         if skin:
-            return {
-                "success": True,
-                "skin": skin.to_json()
-            }
+            return Response(
+                content=b'{"success":true,"skin":' + skin.to_json_bytes() + b'}',
+                media_type="application/json"
+            )
         return {"success": False, "error": f"Skin '{skin_name}' not found"}
     except Exception as e:
         logger.error(f"Error getting skin {skin_name}: {e}")
@@ -2649,8 +2650,8 @@ async def get_family_calendar():
         if icloud_url:
             # Use the real iCloud calendar collector
             try:
-                from collectors.icloud_calendar_collector import ICloudCalendarCollector
-                collector = ICloudCalendarCollector(icloud_url)
+                from collectors.icloud_calendar_collector import get_icloud_calendar_collector
+                collector = get_icloud_calendar_collector(icloud_url)
                 events = await collector.get_events(days_ahead=30)
                 
                 if events:
@@ -2738,9 +2739,9 @@ async def test_icloud_calendar(request: Request):
 async def get_ebay_auctions(category: str = "retro_tech"):
     """Get eBay auctions for retro tech"""
     try:
-        from collectors.ebay_auction_collector import EBayAuctionCollector
+        from collectors.ebay_auction_collector import get_ebay_auction_collector
         
-        collector = EBayAuctionCollector()
+        collector = get_ebay_auction_collector()
         
         if category == "retro_tech":
             auctions = await collector.get_retro_tech_auctions()
@@ -4234,7 +4235,10 @@ async def get_weather(lat: float | None = None, lon: float | None = None, locati
                 if units:
                     weather_collector.units = units
                 logger.info("Instantiated WeatherCollector.")
-                weather_data = await weather_collector.collect_data()
+                try:
+                    weather_data = await weather_collector.collect_data()
+                finally:
+                    await weather_collector.close()
                 logger.info(f"WeatherCollector.collect_data() returned: {weather_data}")
                 if weather_data:
                     # Format the data for display
@@ -4387,7 +4391,7 @@ async def get_ambient_weather():
     - Air quality (if sensor present)
     """
     try:
-        from collectors.ambient_weather_collector import AmbientWeatherCollector
+        from collectors.ambient_weather_collector import get_ambient_weather_collector
         from config.settings import settings
         
         # Get API keys from settings or environment
@@ -4426,7 +4430,7 @@ async def get_ambient_weather():
                 "help": "Get your API key and Application key from your AmbientWeather.net account page"
             }
         
-        collector = AmbientWeatherCollector(api_key=api_key, application_key=app_key)
+        collector = await get_ambient_weather_collector(api_key, app_key)
         weather = await collector.get_current_weather()
         
         if not weather:
@@ -4451,7 +4455,7 @@ async def get_ambient_weather():
 async def get_ambient_stations():
     """Get all Ambient Weather stations and their current data."""
     try:
-        from collectors.ambient_weather_collector import AmbientWeatherCollector
+        from collectors.ambient_weather_collector import get_ambient_weather_collector
         from config.settings import settings
         
         api_key = None
@@ -4482,7 +4486,7 @@ async def get_ambient_stations():
         if not api_key or not app_key:
             return {"success": False, "stations": [], "error": "Not configured"}
         
-        collector = AmbientWeatherCollector(api_key=api_key, application_key=app_key)
+        collector = await get_ambient_weather_collector(api_key, app_key)
         stations = await collector.get_all_stations()
         
         return {
@@ -9764,6 +9768,21 @@ async def shutdown_event():
     logger.info("Shutting down background data collection...")
     background_manager.stop()
     logger.info("Background threads stopped")
+    
+    try:
+        from collectors.ambient_weather_collector import close_ambient_weather_collector
+        await close_ambient_weather_collector()
+    except Exception as e:
+        logger.warning(f"Error closing Ambient Weather session: {e}")
+    
+    try:
+        from collectors.base_collector import close_shared_clients
+        await close_shared_clients()
+    except Exception as e:
+        logger.warning(f"Error closing shared HTTP clients: {e}")
+    
+    if AI_ASSISTANT_AVAILABLE:
+        await ai_manager.close_all()
 
 # ===================================================================
 # SERVER MANAGEMENT ENDPOINTS
@@ -2,28 +2,89 @@
 AI Provider implementations for multiple backends (Ollama, OpenAI, Gemini).
 """
 
-import json
 import logging
 import hashlib
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, List, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator, Set, Union
 from abc import ABC, abstractmethod
 
-import aiohttp
+import httpx
+import orjson
 import openai
 from openai import AsyncOpenAI
 
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+async def _iter_ndjson(response: httpx.Response) -> AsyncGenerator[Dict[str, Any], None]:
+    """Yield parsed objects from an NDJSON response body.
+    
+    Works on raw bytes (orjson parses them directly, no decode/strip) and
+    buffers partial lines that span chunk boundaries.
+    """
+    pending = b""
+    async for chunk in response.aiter_bytes():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line:
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+    if pending.strip():
+        try:
+            yield orjson.loads(pending)
+        except orjson.JSONDecodeError:
+            pass
+
+
 class AIProvider(ABC):
     """Base class for AI providers."""
     
+    # Default cap on in-flight requests; override per provider or via config['max_concurrency']
+    DEFAULT_MAX_CONCURRENCY = 10
+    
     def __init__(self, name: str, config: Dict[str, Any]):
         self.name = name
         self.config = config
         self.provider_type = self.__class__.__name__.lower().replace('provider', '')
+        self.max_concurrency = config.get('max_concurrency', self.DEFAULT_MAX_CONCURRENCY)
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it lazily on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, read=120.0),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the shared HTTP client; it is recreated on next use."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+    
+    async def close_when_idle(self):
+        """Close once requests already in flight have finished."""
+        for _ in range(self.max_concurrency):
+            await self._sem.acquire()
+        try:
+            await self.close()
+        finally:
+            for _ in range(self.max_concurrency):
+                self._sem.release()
     
     @abstractmethod
     async def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
@@ -41,20 +102,43 @@ class AIProvider(ABC):
         pass
     
     def generate_training_hash(self, training_data: List[Dict[str, Any]]) -> str:
-        """Generate hash for training data to detect changes."""
-        content = json.dumps(training_data, sort_keys=True)
-        return hashlib.sha256(content.encode()).hexdigest()
+        """Generate hash for training data to detect changes.
+        
+        The digest is prefixed with the algorithm name ("blake3:" or
+        "sha256:") so hashes from installs with and without blake3 never
+        compare equal by accident.
+        """
+        if BLAKE3_AVAILABLE:
+            algorithm, h = 'blake3', blake3()
+        else:
+            algorithm, h = 'sha256', hashlib.sha256()
+        for item in training_data:
+            h.update(orjson.dumps(item, option=orjson.OPT_SORT_KEYS))
+            h.update(b'\n')
+        return f"{algorithm}:{h.hexdigest()}"
 
 
 class OllamaProvider(AIProvider):
     """Ollama local AI provider."""
     
+    DEFAULT_MAX_CONCURRENCY = 4
+    
+    _DEFAULT_SYSTEM_PROMPT = """You are a helpful AI assistant.
+
+Keep answers concise (2-3 sentences). Be helpful and friendly."""
+    
+    _MODELFILE_TEMPLATE = """FROM {model}
+SYSTEM "{system}"
+PARAMETER temperature 0.7
+PARAMETER top_p 0.9"""
+    
     def __init__(self, name: str, config: Dict[str, Any]):
         super().__init__(name, config)
         self.base_url = config.get('base_url', 'http://localhost:11434')
         self.model_name = config.get('model_name', 'llama3.2:1b')
         self.custom_system_prompt = config.get('system_prompt', None)
         self.system_prompt = self._build_system_prompt()
+        self._system_msg = {'role': 'system', 'content': self.system_prompt}
     
     def _build_system_prompt(self) -> str:
         """Build system prompt, using custom prompt from skin if available."""
@@ -63,81 +147,68 @@ class OllamaProvider(AIProvider):
             return self.custom_system_prompt
         
         # Default fallback prompt
-        return """You are a helpful AI assistant.
-
-Keep answers concise (2-3 sentences). Be helpful and friendly."""
+        return self._DEFAULT_SYSTEM_PROMPT
     
     def update_system_prompt(self, prompt: str):
         """Update the system prompt (e.g., when skin changes)."""
         self.custom_system_prompt = prompt
         self.system_prompt = prompt
+        self._system_msg = {'role': 'system', 'content': prompt}
         logger.info(f"Updated AI system prompt for {self.name}")
     
     async def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
         """Send chat messages to Ollama."""
-        try:
-            # Add system message if not present
-            if not messages or messages[0].get('role') != 'system':
-                messages.insert(0, {'role': 'system', 'content': self.system_prompt})
-                logger.info(f"Added system prompt to messages (length: {len(self.system_prompt)})")
-            else:
-                logger.info(f"System message already present (length: {len(messages[0].get('content', ''))})")
+        async with self._sem:
+            try:
+                # Add system message if not present (without mutating the caller's list)
+                has_system = bool(messages) and messages[0].get('role') == 'system'
+                if not has_system:
+                    messages = [self._system_msg, *messages]
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{'Using caller' if has_system else 'Added'} system prompt "
+                                 f"(length: {len(messages[0].get('content', ''))})")
             
-            logger.info(f"Sending {len(messages)} messages to Ollama model: {self.model_name}")
+                logger.info(f"Sending {len(messages)} messages to Ollama model: {self.model_name}")
             
-            async with aiohttp.ClientSession() as session:
+                client = self._get_client()
                 # Try /api/chat first (newer Ollama versions)
                 payload = {
                     'model': self.model_name,
                     'messages': messages,
-                    'stream': stream,
+                    # Always stream: Ollama emits NDJSON chunks we can parse as they arrive
+                    'stream': True,
                     'options': {
                         'num_predict': 100,  # Limit response length for concise replies
                         'temperature': 0.7,
                         'stop': ['\n\n\n', '---', 'Best regards', '[Your Name]']  # Stop generation early
                     }
                 }
-                
+            
                 logger.debug(f"Ollama payload: model={self.model_name}, num_messages={len(messages)}")
-                
-                async with session.post(f"{self.base_url}/api/chat", json=payload) as response:
+            
+                async with client.stream("POST", f"{self.base_url}/api/chat", json=payload) as response:
                     # If we get a 404, fall back to /api/generate (older Ollama versions)
-                    if response.status == 404:
+                    if response.status_code == 404:
                         logger.info("Ollama /api/chat not found, falling back to /api/generate")
-                        return await self._chat_with_generate(session, messages, stream)
-                    elif response.status == 200:
-                        if stream:
-                            # Handle streaming response
-                            content = ""
-                            async for line in response.content:
-                                if line:
-                                    try:
-                                        line_text = line.decode().strip()
-                                        if line_text:
-                                            data = json.loads(line_text)
-                                            if 'message' in data and 'content' in data['message']:
-                                                content += data['message']['content']
-                                    except json.JSONDecodeError:
-                                        continue
-                            return content
-                        else:
-                            # Handle non-streaming response - get full JSON response
-                            response_text = await response.text()
-                            data = json.loads(response_text)
+                        return await self._chat_with_generate(messages, stream)
+                    elif response.status_code == 200:
+                        parts = []
+                        async for data in _iter_ndjson(response):
                             if 'message' in data and 'content' in data['message']:
-                                return data['message']['content']
-                            else:
-                                return "No content received from Ollama"
+                                parts.append(data['message']['content'])
+                        if parts:
+                            return "".join(parts)
+                        return "No content received from Ollama"
                     else:
-                        error_msg = f"Ollama API error: {response.status}"
+                        error_msg = f"Ollama API error: {response.status_code}"
                         logger.error(error_msg)
                         return f"Error: {error_msg}"
-                        
-        except Exception as e:
-            logger.error(f"Error communicating with Ollama: {e}")
-            return f"Error: Could not connect to Ollama server"
+                    
+            except Exception as e:
+                logger.error(f"Error communicating with Ollama: {e}")
+                return f"Error: Could not connect to Ollama server"
     
-    async def _chat_with_generate(self, session: aiohttp.ClientSession, messages: List[Dict[str, str]], stream: bool = False) -> str:
+    async def _chat_with_generate(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
         """Fallback method using /api/generate for older Ollama versions."""
         try:
             # Convert chat messages to a single prompt for /api/generate
@@ -161,33 +232,21 @@ Keep answers concise (2-3 sentences). Be helpful and friendly."""
             payload = {
                 'model': self.model_name,
                 'prompt': prompt,
-                'stream': stream
+                'stream': True
             }
             
-            async with session.post(f"{self.base_url}/api/generate", json=payload) as response:
-                if response.status == 200:
-                    if stream:
-                        content = ""
-                        async for line in response.content:
-                            if line:
-                                try:
-                                    line_text = line.decode().strip()
-                                    if line_text:
-                                        data = json.loads(line_text)
-                                        if 'response' in data:
-                                            content += data['response']
-                                except json.JSONDecodeError:
-                                    continue
-                        return content
-                    else:
-                        response_text = await response.text()
-                        data = json.loads(response_text)
+            client = self._get_client()
+            async with client.stream("POST", f"{self.base_url}/api/generate", json=payload) as response:
+                if response.status_code == 200:
+                    parts = []
+                    async for data in _iter_ndjson(response):
                         if 'response' in data:
-                            return data['response']
-                        else:
-                            return "No response received from Ollama"
+                            parts.append(data['response'])
+                    if parts:
+                        return "".join(parts)
+                    return "No response received from Ollama"
                 else:
-                    error_msg = f"Ollama generate API error: {response.status}"
+                    error_msg = f"Ollama generate API error: {response.status_code}"
                     logger.error(error_msg)
                     return f"Error: {error_msg}"
         except Exception as e:
@@ -196,168 +255,224 @@ Keep answers concise (2-3 sentences). Be helpful and friendly."""
     
     async def train(self, training_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Train Ollama model with new data."""
-        try:
-            # For Ollama, we create a custom model with fine-tuning data
-            modelfile_content = self._create_modelfile(training_data)
+        async with self._sem:
+            try:
+                # For Ollama, we create a custom model with fine-tuning data
+                modelfile_content = self._create_modelfile(training_data)
             
-            async with aiohttp.ClientSession() as session:
+                client = self._get_client()
                 payload = {
                     'name': f"{self.model_name}_finetuned_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
                     'modelfile': modelfile_content
                 }
-                
-                async with session.post(f"{self.base_url}/api/create", json=payload) as response:
-                    if response.status == 200:
-                        return {
-                            'status': 'success',
-                            'model_name': payload['name'],
-                            'training_samples': len(training_data)
-                        }
-                    else:
-                        return {
-                            'status': 'error',
-                            'error': f"Training failed: {response.status}"
-                        }
-                        
-        except Exception as e:
-            logger.error(f"Error training Ollama model: {e}")
-            return {
-                'status': 'error',
-                'error': str(e)
-            }
+            
+                response = await client.post(f"{self.base_url}/api/create", json=payload)
+                if response.status_code == 200:
+                    return {
+                        'status': 'success',
+                        'model_name': payload['name'],
+                        'training_samples': len(training_data)
+                    }
+                else:
+                    return {
+                        'status': 'error',
+                        'error': f"Training failed: {response.status_code}"
+                    }
+                    
+            except Exception as e:
+                logger.error(f"Error training Ollama model: {e}")
+                return {
+                    'status': 'error',
+                    'error': str(e)
+                }
     
     def _create_modelfile(self, training_data: List[Dict[str, Any]]) -> str:
         """Create Ollama modelfile with training data."""
-        examples = []
-        for item in training_data[:50]:  # Limit examples
-            if item['data_type'].startswith('liked_'):
-                examples.append(f"User liked: {item['content'][:200]}...")
+        examples = "\n".join(
+            f"User liked: {item['content'][:200]}..."
+            for item in training_data[:50]  # Limit examples
+            if item['data_type'].startswith('liked_')
+        )
         
-        system_prompt = self.system_prompt + "\n\nUser preferences based on liked content:\n" + "\n".join(examples)
+        system_prompt = "".join((self.system_prompt, "\n\nUser preferences based on liked content:\n", examples))
         
-        return f"""FROM {self.model_name}
-SYSTEM "{system_prompt}"
-PARAMETER temperature 0.7
-PARAMETER top_p 0.9"""
+        return self._MODELFILE_TEMPLATE.format_map({'model': self.model_name, 'system': system_prompt})
     
     async def health_check(self) -> bool:
         """Check Ollama server health."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/api/tags") as response:
-                    return response.status == 200
-        except:
-            return False
+        async with self._sem:
+            try:
+                response = await self._get_client().get(f"{self.base_url}/api/tags")
+                return response.status_code == 200
+            except:
+                return False
 
 
 class OpenAIProvider(AIProvider):
     """OpenAI GPT provider."""
     
-    def __init__(self, name: str, config: Dict[str, Any]):
+    DEFAULT_MAX_CONCURRENCY = 20
+    
+    _ROGER_SYS = """You are Roger, Parker's friendly, funny buddy. Be warm, calm, and supportive with short, actionable replies.
+- Offer career/learning ideas as tiny, low-pressure steps.
+- Give gentle, practical anxiety support (breathing, grounding, one small action).
+- Encourage meeting friends online/offline safely; suggest friendly communities.
+- Use Parker's interests (retro PCs, Garfield, coding) to make ideas playful.
+- Keep tone kind, encouraging, and lightly humorous; celebrate small wins."""
+    
+    def __init__(self, name: str, config: Dict[str, Any], http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(name, config)
         self.api_key = config.get('api_key')
         self.model_name = config.get('model_name', 'gpt-3.5-turbo')
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # An injected client belongs to the caller, so close() leaves it open
+        self._owns_http_client = http_client is None
+        self.client = AsyncOpenAI(api_key=self.api_key, http_client=http_client or self._build_http_client())
         self.system_prompt = self._build_system_prompt()
+        self._system_msg = {'role': 'system', 'content': self.system_prompt}
+    
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Create the pooled httpx client used by the OpenAI SDK."""
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(120.0),
+            limits=httpx.Limits(
+                max_connections=self.config.get('max_connections', 200),
+                max_keepalive_connections=self.config.get('max_keepalive', 100)
+            )
+        )
+    
+    def _get_openai_client(self) -> AsyncOpenAI:
+        """Return the OpenAI client, rebuilding it if close() shut it down."""
+        if self._owns_http_client and self.client.is_closed():
+            self.client = AsyncOpenAI(api_key=self.api_key, http_client=self._build_http_client())
+        return self.client
     
     def _build_system_prompt(self) -> str:
         """Build system prompt tuned for Parker's friendly companion 'Roger'."""
-        return """You are Roger, Parker's friendly, funny buddy. Be warm, calm, and supportive with short, actionable replies.
-- Offer career/learning ideas as tiny, low-pressure steps.
-- Give gentle, practical anxiety support (breathing, grounding, one small action).
-- Encourage meeting friends online/offline safely; suggest friendly communities.
-- Use Parker's interests (retro PCs, Garfield, coding) to make ideas playful.
-- Keep tone kind, encouraging, and lightly humorous; celebrate small wins."""
+        return self._ROGER_SYS
     
-    async def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
-        """Send chat messages to OpenAI."""
-        try:
-            # Add system message if not present
-            if not messages or messages[0].get('role') != 'system':
-                messages.insert(0, {'role': 'system', 'content': self.system_prompt})
+    async def chat(self, messages: List[Dict[str, str]], stream: bool = False,
+                   variants: int = 1) -> Union[str, List[str]]:
+        """Send chat messages to OpenAI.
+        
+        With variants > 1 the completions are sampled in a single request
+        (n=variants) and a list of response texts is returned.
+        """
+        async with self._sem:
+            try:
+                # Add system message if not present (without mutating the caller's list)
+                if not messages or messages[0].get('role') != 'system':
+                    messages = [self._system_msg, *messages]
             
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000,
-                stream=stream
-            )
+                if variants > 1:
+                    response = await self._get_openai_client().chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=1000,
+                        n=variants
+                    )
+                    return [choice.message.content or '' for choice in response.choices]
             
-            if stream:
-                content = ""
-                async for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content += chunk.choices[0].delta.content
-                return content
-            else:
-                return response.choices[0].message.content
+                response = await self._get_openai_client().chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=1000,
+                    stream=stream
+                )
+            
+                if stream:
+                    content = ""
+                    async for chunk in response:
+                        if chunk.choices[0].delta.content:
+                            content += chunk.choices[0].delta.content
+                    return content
+                else:
+                    return response.choices[0].message.content
                 
-        except Exception as e:
-            logger.error(f"Error with OpenAI API: {e}")
-            return f"Error: OpenAI API error - {str(e)}"
+            except Exception as e:
+                logger.error(f"Error with OpenAI API: {e}")
+                return f"Error: OpenAI API error - {str(e)}"
     
     async def train(self, training_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fine-tune OpenAI model."""
-        try:
-            # Prepare training data in OpenAI format
-            training_file_data = self._prepare_training_data(training_data)
+        async with self._sem:
+            try:
+                # Prepare training data in OpenAI format
+                training_file_data = self._prepare_training_data(training_data)
             
-            # Upload training file
-            training_file = await self.client.files.create(
-                file=training_file_data,
-                purpose="fine-tune"
-            )
+                # Upload training file
+                training_file = await self._get_openai_client().files.create(
+                    file=training_file_data,
+                    purpose="fine-tune"
+                )
             
-            # Create fine-tuning job
-            fine_tune_job = await self.client.fine_tuning.jobs.create(
-                training_file=training_file.id,
-                model=self.model_name
-            )
+                # Create fine-tuning job
+                fine_tune_job = await self._get_openai_client().fine_tuning.jobs.create(
+                    training_file=training_file.id,
+                    model=self.model_name
+                )
             
-            return {
-                'status': 'started',
-                'job_id': fine_tune_job.id,
-                'training_samples': len(training_data)
-            }
+                return {
+                    'status': 'started',
+                    'job_id': fine_tune_job.id,
+                    'training_samples': len(training_data)
+                }
             
-        except Exception as e:
-            logger.error(f"Error fine-tuning OpenAI model: {e}")
-            return {
-                'status': 'error',
-                'error': str(e)
-            }
+            except Exception as e:
+                logger.error(f"Error fine-tuning OpenAI model: {e}")
+                return {
+                    'status': 'error',
+                    'error': str(e)
+                }
     
     def _prepare_training_data(self, training_data: List[Dict[str, Any]]) -> str:
         """Prepare training data in OpenAI JSONL format."""
-        training_examples = []
+        sys_msg = self._system_msg
+        liked = (item for item in training_data if item['data_type'].startswith('liked_'))
         
-        for item in training_data:
-            if item['data_type'].startswith('liked_'):
-                # Create training example from liked content
-                example = {
-                    "messages": [
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"What do you think about this {item['data_type']}?"},
-                        {"role": "assistant", "content": f"Based on your preferences, this {item['data_type']} seems relevant because {item.get('context', 'you liked similar content')}. {item['content'][:100]}..."}
-                    ]
-                }
-                training_examples.append(json.dumps(example))
+        # Create one training example per liked item
+        examples = (
+            {
+                "messages": [
+                    sys_msg,
+                    {"role": "user", "content": f"What do you think about this {item['data_type']}?"},
+                    {"role": "assistant", "content": f"Based on your preferences, this {item['data_type']} seems relevant because {item.get('context', 'you liked similar content')}. {item['content'][:100]}..."}
+                ]
+            }
+            for item in liked
+        )
         
-        return "\n".join(training_examples)
+        return b"\n".join(orjson.dumps(example) for example in examples).decode()
+    
+    async def close(self):
+        """Close the OpenAI client if this provider created its httpx client."""
+        if self._owns_http_client:
+            await self.client.close()
+        await super().close()
     
     async def health_check(self) -> bool:
         """Check OpenAI API health."""
-        try:
-            await self.client.models.list()
-            return True
-        except:
-            return False
+        async with self._sem:
+            try:
+                await self._get_openai_client().models.list()
+                return True
+            except:
+                return False
 
 
 class GeminiProvider(AIProvider):
     """Google Gemini provider."""
     
+    DEFAULT_MAX_CONCURRENCY = 20
+    
+    _ROGER_SYS = """You are Roger, Parker's friendly, funny buddy. Stay warm and calm; keep replies short and doable.
+- Offer career/learning nudges as tiny steps.
+- Share anxiety-friendly tips (breathing resets, grounding, one-step plans).
+- Encourage safe social connection online/offline; suggest communities to try.
+- Use Parker's interests (retro Windows PCs, Garfield, coding) to keep it playful.
+- Be encouraging and light; celebrate every small win."""
+    
     def __init__(self, name: str, config: Dict[str, Any]):
         super().__init__(name, config)
         self.api_key = config.get('api_key')
@@ -367,20 +482,16 @@ class GeminiProvider(AIProvider):
     
     def _build_system_prompt(self) -> str:
         """Build system prompt tuned for Parker's friendly companion 'Roger'."""
-        return """You are Roger, Parker's friendly, funny buddy. Stay warm and calm; keep replies short and doable.
-- Offer career/learning nudges as tiny steps.
-- Share anxiety-friendly tips (breathing resets, grounding, one-step plans).
-- Encourage safe social connection online/offline; suggest communities to try.
-- Use Parker's interests (retro Windows PCs, Garfield, coding) to keep it playful.
-- Be encouraging and light; celebrate every small win."""
+        return self._ROGER_SYS
     
     async def chat(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
         """Send chat messages to Gemini."""
-        try:
-            # Convert messages to Gemini format
-            contents = self._convert_messages_to_gemini_format(messages)
+        async with self._sem:
+            try:
+                # Convert messages to Gemini format
+                contents = self._convert_messages_to_gemini_format(messages)
             
-            async with aiohttp.ClientSession() as session:
+                client = self._get_client()
                 url = f"{self.base_url}/models/{self.model_name}:generateContent"
                 headers = {'Content-Type': 'application/json'}
                 payload = {
@@ -390,43 +501,37 @@ class GeminiProvider(AIProvider):
                         'maxOutputTokens': 1000,
                     }
                 }
-                
-                async with session.post(url, json=payload, headers=headers, params={'key': self.api_key}) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-                    else:
-                        error_msg = f"Gemini API error: {response.status}"
-                        logger.error(error_msg)
-                        return f"Error: {error_msg}"
-                        
-        except Exception as e:
-            logger.error(f"Error with Gemini API: {e}")
-            return f"Error: Gemini API error - {str(e)}"
+            
+                response = await client.post(url, json=payload, headers=headers, params={'key': self.api_key})
+                if response.status_code == 200:
+                    data = orjson.loads(response.content)
+                    return data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+                else:
+                    error_msg = f"Gemini API error: {response.status_code}"
+                    logger.error(error_msg)
+                    return f"Error: {error_msg}"
+                    
+            except Exception as e:
+                logger.error(f"Error with Gemini API: {e}")
+                return f"Error: Gemini API error - {str(e)}"
     
     def _convert_messages_to_gemini_format(self, messages: List[Dict[str, str]]) -> List[Dict]:
         """Convert chat messages to Gemini format."""
+        # Gemini doesn't have system role; a leading system message is
+        # prepended to the first content entry if that entry is a user turn
+        sys_prefix = f"{messages[0]['content']}\n\n" if messages and messages[0]['role'] == 'system' else ""
         contents = []
         
         for msg in messages:
-            if msg['role'] == 'system':
-                # Gemini doesn't have system role, prepend to first user message
+            role = msg['role']
+            if role == 'user':
+                text = sys_prefix + msg['content'] if sys_prefix else msg['content']
+                contents.append({'role': 'user', 'parts': [{'text': text}]})
+            elif role == 'assistant':
+                contents.append({'role': 'model', 'parts': [{'text': msg['content']}]})
+            else:
                 continue
-            elif msg['role'] == 'user':
-                contents.append({
-                    'role': 'user',
-                    'parts': [{'text': msg['content']}]
-                })
-            elif msg['role'] == 'assistant':
-                contents.append({
-                    'role': 'model', 
-                    'parts': [{'text': msg['content']}]
-                })
-        
-        # Add system prompt to first user message if exists
-        if contents and messages and messages[0]['role'] == 'system':
-            if contents[0]['role'] == 'user':
-                contents[0]['parts'][0]['text'] = f"{messages[0]['content']}\n\n{contents[0]['parts'][0]['text']}"
+            sys_prefix = ""
         
         return contents
     
@@ -441,13 +546,13 @@ class GeminiProvider(AIProvider):
     
     async def health_check(self) -> bool:
         """Check Gemini API health."""
-        try:
-            async with aiohttp.ClientSession() as session:
+        async with self._sem:
+            try:
                 url = f"{self.base_url}/models"
-                async with session.get(url, params={'key': self.api_key}) as response:
-                    return response.status == 200
-        except:
-            return False
+                response = await self._get_client().get(url, params={'key': self.api_key})
+                return response.status_code == 200
+            except:
+                return False
 
 
 class AIProviderManager:
@@ -456,18 +561,50 @@ class AIProviderManager:
     def __init__(self):
         self.providers: Dict[str, AIProvider] = {}
         self.default_provider: Optional[str] = None
+        # Pending close tasks for cleared providers, referenced until they finish
+        self._closing: Set[asyncio.Task] = set()
+        # Memoized list_providers() result, reset whenever providers change
+        self._list_cache: Optional[List[Dict[str, Any]]] = None
     
     def clear_providers(self):
-        """Clear all registered providers."""
+        """Clear all registered providers and close their HTTP clients."""
+        providers = list(self.providers.values())
         self.providers.clear()
         self.default_provider = None
+        self._list_cache = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            for provider in providers:
+                task = loop.create_task(provider.close_when_idle())
+                self._closing.add(task)
+                task.add_done_callback(self._on_close_done)
         logger.info("Cleared all AI providers")
     
+    def _on_close_done(self, task: asyncio.Task):
+        """Drop a finished close task and log any error it raised."""
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Error closing AI provider: {task.exception()}")
+    
+    async def close_all(self):
+        """Close HTTP clients held by all registered providers."""
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        for provider in self.providers.values():
+            try:
+                await provider.close()
+            except Exception as e:
+                logger.warning(f"Error closing AI provider {provider.name}: {e}")
+    
     def register_provider(self, provider: AIProvider, is_default: bool = False):
         """Register an AI provider."""
         self.providers[provider.name] = provider
         if is_default or not self.default_provider:
             self.default_provider = provider.name
+        self._list_cache = None
     
     def get_provider(self, name: str = None) -> Optional[AIProvider]:
         """Get provider by name or default."""
@@ -477,24 +614,31 @@ class AIProviderManager:
     
     def list_providers(self) -> List[Dict[str, Any]]:
         """List all providers with their status."""
-        return [
-            {
-                'name': name,
-                'type': provider.provider_type,
-                'is_default': name == self.default_provider
-            }
-            for name, provider in self.providers.items()
-        ]
+        if self._list_cache is None:
+            self._list_cache = [
+                {
+                    'name': name,
+                    'type': provider.provider_type,
+                    'is_default': name == self.default_provider
+                }
+                for name, provider in self.providers.items()
+            ]
+        # Hand out copies so callers can't alter the memoized entries
+        return [dict(entry) for entry in self._list_cache]
     
     async def health_check_all(self) -> Dict[str, bool]:
         """Check health of all providers."""
-        results = {}
-        for name, provider in self.providers.items():
-            try:
-                results[name] = await provider.health_check()
-            except:
-                results[name] = False
-        return results
+        if not self.providers:
+            return {}
+        names, providers = zip(*self.providers.items())
+        results = await asyncio.gather(
+            *(provider.health_check() for provider in providers),
+            return_exceptions=True
+        )
+        return {
+            name: False if isinstance(result, BaseException) else result
+            for name, result in zip(names, results)
+        }
 
 
 # Global provider manager instance
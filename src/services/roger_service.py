@@ -8,49 +8,127 @@ history, Star Wars, high anxiety).
 """
 from typing import Dict, Any, Optional
 from services.ai_service import AIService
+from processors.ai_providers import OpenAIProvider
+from collectors.base_collector import get_shared_client
+from collectors.weather_collector import WeatherCollector
+import asyncio
 import logging
+import re
+import orjson
 
 logger = logging.getLogger(__name__)
 
+_PERSONA_NOTE = (
+    "You are Roger, a calm, encouraging, practical companion for Parker. "
+    "Parker is 19 years old, repairs old PCs and laptops, loves Garfield comics, "
+    "enjoys history and Star Wars, and has high anxiety. Keep replies brief, supportive, "
+    "and give one small actionable step when appropriate. Return JSON with keys: "
+    "parts_search_terms, parts_tips, history_fact, starwars_fact, "
+    "positive_quote, jokes, subreddit_suggestions."
+)
+
+_USER_PROMPT = (
+    "Please provide the following, in JSON only (no extra commentary):\n"
+    "- parts_search_terms: a short list of 3 search phrases to find spare parts for retro laptops/PCs.\n"
+    "- parts_tips: 2 concise tips for finding compatible spare parts.\n"
+    "- history_fact: one interesting history fact Parker may like (1-2 sentences).\n"
+    "- starwars_fact: one Star Wars fact or trivia item (1-2 sentences).\n"
+    "- positive_quote: one short encouraging psychology-based quote (<=2 lines).\n"
+    "- jokes: list 3 dad jokes or light-hearted jokes (silly/retro PC themed if possible).\n"
+    "- subreddit_suggestions: list 4 subreddits with a 1-line tip for how Parker could interact (be supportive).\n"
+    "Return strictly valid JSON object with these keys."
+)
+
+# Single message for AIService.chat (it wraps provider chat and context)
+_ROGER_PROMPT = _PERSONA_NOTE + "\n\n" + _USER_PROMPT
+
+# Outermost {...} block; models often wrap the JSON in prose or code fences
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Completions sampled in one OpenAI request when retrying after a non-JSON reply
+_OPENAI_RETRY_VARIANTS = 3
+
+# Garfield and weather are plain lookups, so they skip the LLM entirely
+_GARFIELD_RANDOM_URL = "http://localhost:8008/api/comics/garfield/random"
+_SEVERE_WEATHER_WORDS = ('tornado', 'hurricane', 'blizzard', 'thunderstorm', 'extreme', 'squall', 'hail')
+
+def _parse_json_block(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the first JSON object found in text, or return None."""
+    m = _JSON_RE.search(text)
+    if not m:
+        return None
+    try:
+        parsed = orjson.loads(m.group(0))
+    except orjson.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
 
 class RogerService:
     def __init__(self, ai_service: Optional[AIService] = None):
         self.ai = ai_service or AIService()
+        self.weather = WeatherCollector()
+
+    async def close(self):
+        """Close the weather collector's HTTP session."""
+        await self.weather.close()
 
     async def build_home_content(self) -> Dict[str, Any]:
         """Return structured content for the home page.
 
-        Uses the local AI provider if available; falls back to concise
-        heuristics when not.
+        The Garfield URL, weather summary and LLM-written sections are
+        fetched concurrently; any part that fails keeps its heuristic
+        fallback value.
         """
-        persona_note = (
-            "You are Roger, a calm, encouraging, practical companion for Parker. "
-            "Parker is 19 years old, repairs old PCs and laptops, loves Garfield comics, "
-            "enjoys history and Star Wars, and has high anxiety. Keep replies brief, supportive, "
-            "and give one small actionable step when appropriate. Return JSON with keys: "
-            "garfield_url, parts_search_terms, parts_tips, history_fact, starwars_fact, "
-            "weather_summary, positive_quote, subreddit_suggestions."
+        garfield_url, weather_summary, llm_content = await asyncio.gather(
+            self._garfield_url(), self._weather_summary(), self._llm_json_block()
         )
 
-        system_prompt = persona_note
-        user_prompt = (
-            "Please provide the following, in JSON only (no extra commentary):\n"
-            "- garfield_url: a URL (or empty string) for today's Garfield comic image.\n"
-            "- parts_search_terms: a short list of 3 search phrases to find spare parts for retro laptops/PCs.\n"
-            "- parts_tips: 2 concise tips for finding compatible spare parts.\n"
-            "- history_fact: one interesting history fact Parker may like (1-2 sentences).\n"
-            "- starwars_fact: one Star Wars fact or trivia item (1-2 sentences).\n"
-            "- weather_summary: include current summary and 'EXTREME' if severe, else normal.\n"
-            "- positive_quote: one short encouraging psychology-based quote (<=2 lines).\n"
-            "- jokes: list 3 dad jokes or light-hearted jokes (silly/retro PC themed if possible).\n"
-            "- subreddit_suggestions: list 4 subreddits with a 1-line tip for how Parker could interact (be supportive).\n"
-            "Return strictly valid JSON object with these keys."
-        )
+        content = _fallback_content()
+        if llm_content:
+            content.update(llm_content)
+        if garfield_url:
+            content["garfield_url"] = garfield_url
+        if weather_summary:
+            content["weather_summary"] = weather_summary
+        return content
 
+    async def _garfield_url(self) -> Optional[str]:
+        """Image URL for a Garfield strip from the dashboard's own comic endpoint."""
         try:
-            # Build a single message for AIService.chat (it wraps provider chat and context)
-            prompt = system_prompt + "\n\n" + user_prompt
-            ai_result = await self.ai.chat(prompt, conversation_id=None, include_context=False)
+            response = await get_shared_client("roger", timeout=8.0).get(_GARFIELD_RANDOM_URL)
+            if response.status_code != 200:
+                return None
+            data = orjson.loads(response.content)
+            comic = data.get('comic') or data
+            return comic.get('image_url') or comic.get('url')
+        except Exception as e:
+            logger.warning("RogerService: garfield fetch failed: %s", e)
+            return None
+
+    async def _weather_summary(self) -> Optional[str]:
+        """One-line live weather summary, tagged EXTREME when severe.
+
+        Returns None without an API key or when the lookup fails, so the
+        fallback text shows instead of the collector's mock conditions.
+        """
+        if not self.weather.is_configured():
+            return None
+        try:
+            weather = await self.weather.fetch_current_weather()
+            if weather is None:
+                return None
+            description = weather.description
+            severity = 'EXTREME' if any(w in description.lower() for w in _SEVERE_WEATHER_WORDS) else 'normal'
+            return f"{description}, {round(weather.temperature)}° in {weather.location} ({severity})"
+        except Exception as e:
+            logger.warning("RogerService: weather lookup failed: %s", e)
+            return None
+
+    async def _llm_json_block(self) -> Optional[Dict[str, Any]]:
+        """Ask the AI provider for the free-text sections as a JSON object."""
+        try:
+            ai_result = await self.ai.chat(_ROGER_PROMPT, conversation_id=None, include_context=False)
 
             # ai_result expected to be a dict with 'success' and 'response'
             if isinstance(ai_result, dict):
@@ -58,34 +136,50 @@ class RogerService:
             else:
                 resp_text = str(ai_result)
 
-            import json
-            try:
-                parsed = json.loads(resp_text)
+            parsed = _parse_json_block(resp_text)
+            if parsed is not None:
                 return parsed
-            except Exception:
-                logger.warning("RogerService: AI returned non-JSON, falling back to heuristic content")
+
+            provider = self.ai.get_provider()
+            if isinstance(provider, OpenAIProvider):
+                # One retry that samples several candidates in a single round-trip
+                candidates = await provider.chat(
+                    [{'role': 'system', 'content': _PERSONA_NOTE},
+                     {'role': 'user', 'content': _USER_PROMPT}],
+                    variants=_OPENAI_RETRY_VARIANTS
+                )
+                if isinstance(candidates, str):
+                    candidates = [candidates]
+                for candidate in candidates:
+                    parsed = _parse_json_block(candidate)
+                    if parsed is not None:
+                        return parsed
+            logger.warning("RogerService: AI returned non-JSON, falling back to heuristic content")
 
         except Exception as e:
             logger.exception("RogerService: AI call failed: %s", e)
+        return None
+
 
-        # Fallback heuristics
-        return {
-            "garfield_url": "",
-            "parts_search_terms": ["laptop replacement keyboard vintage", "bios battery retro laptop", "30-pin IDE laptop hard drive replacement"],
-            "parts_tips": ["Check model numbers on spare parts and verify pin counts.", "Search eBay/parts-focused subreddits and message sellers with a clear photo."],
-            "history_fact": "On this day in history, an important event happened (fallback).",
-            "starwars_fact": "A short Star Wars trivia fallback: the original trilogy began in 1977.",
-            "weather_summary": "Weather service unavailable; try again later.",
-            "positive_quote": "Small steps count — try one tiny fix today.",
-            "jokes": [
-                "Why did the computer go to school? Because it wanted to improve its bit!",
-                "Why do Java developers wear glasses? Because they don't C#!",
-                "How many programmers does it take to change a light bulb? None, that's a hardware problem!"
-            ],
-            "subreddit_suggestions": [
-                {"subreddit": "r/VintageComputing", "tip": "Share photos of your repair progress and ask for parts advice."},
-                {"subreddit": "r/techsupport", "tip": "Be concise, include specs and clear photos."},
-                {"subreddit": "r/Garfield", "tip": "Post favorite strips and join lighthearted discussion."},
-                {"subreddit": "r/history", "tip": "Ask for sources politely and reference dates."}
-            ]
-        }
+def _fallback_content() -> Dict[str, Any]:
+    """Heuristic home content used for any section the live sources can't provide."""
+    return {
+        "garfield_url": "",
+        "parts_search_terms": ["laptop replacement keyboard vintage", "bios battery retro laptop", "30-pin IDE laptop hard drive replacement"],
+        "parts_tips": ["Check model numbers on spare parts and verify pin counts.", "Search eBay/parts-focused subreddits and message sellers with a clear photo."],
+        "history_fact": "On this day in history, an important event happened (fallback).",
+        "starwars_fact": "A short Star Wars trivia fallback: the original trilogy began in 1977.",
+        "weather_summary": "Weather service unavailable; try again later.",
+        "positive_quote": "Small steps count — try one tiny fix today.",
+        "jokes": [
+            "Why did the computer go to school? Because it wanted to improve its bit!",
+            "Why do Java developers wear glasses? Because they don't C#!",
+            "How many programmers does it take to change a light bulb? None, that's a hardware problem!"
+        ],
+        "subreddit_suggestions": [
+            {"subreddit": "r/VintageComputing", "tip": "Share photos of your repair progress and ask for parts advice."},
+            {"subreddit": "r/techsupport", "tip": "Be concise, include specs and clear photos."},
+            {"subreddit": "r/Garfield", "tip": "Post favorite strips and join lighthearted discussion."},
+            {"subreddit": "r/history", "tip": "Ask for sources politely and reference dates."}
+        ]
+    }
@@ -0,0 +1,61 @@
+"""
+AIProviderManager: list_providers memoization and invalidation
+"""
+
+import pytest
+
+from processors.ai_providers import AIProviderManager, create_provider
+
+
+def _ollama(name):
+    return create_provider("ollama", name, {"base_url": "http://127.0.0.1:9"})
+
+
+def test_list_providers_reflects_registration():
+    manager = AIProviderManager()
+    assert manager.list_providers() == []
+    
+    manager.register_provider(_ollama("local"))
+    assert manager.list_providers() == [{"name": "local", "type": "ollama", "is_default": True}]
+    
+    manager.register_provider(_ollama("backup"), is_default=True)
+    assert manager.list_providers() == [
+        {"name": "local", "type": "ollama", "is_default": False},
+        {"name": "backup", "type": "ollama", "is_default": True},
+    ]
+
+
+def test_list_providers_result_is_memoized():
+    manager = AIProviderManager()
+    manager.register_provider(_ollama("local"))
+    
+    manager.list_providers()
+    cache = manager._list_cache
+    manager.list_providers()
+    
+    assert manager._list_cache is cache
+
+
+def test_mutating_the_result_does_not_affect_the_cache():
+    manager = AIProviderManager()
+    manager.register_provider(_ollama("local"))
+    
+    listed = manager.list_providers()
+    listed[0]["is_default"] = False
+    listed.append({"name": "bogus"})
+    
+    assert manager.list_providers() == [{"name": "local", "type": "ollama", "is_default": True}]
+
+
+@pytest.mark.asyncio
+async def test_clear_providers_invalidates_the_list():
+    manager = AIProviderManager()
+    manager.register_provider(_ollama("local"))
+    assert manager.list_providers()
+    
+    manager.clear_providers()
+    
+    assert manager.list_providers() == []
+    # Close tasks for the cleared providers are tracked until they finish
+    await manager.close_all()
+    assert not manager._closing
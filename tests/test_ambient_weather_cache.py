@@ -0,0 +1,66 @@
+"""
+Ambient Weather devices cache: lifetime bounds and response reuse
+"""
+
+import orjson
+import pytest
+from aiohttp import web
+
+from collectors.ambient_weather_collector import AmbientWeatherCollector
+
+
+def _collector():
+    return AmbientWeatherCollector(api_key="api", application_key="app")
+
+
+def test_cache_lifetime_defaults_without_headers():
+    assert _collector()._cache_lifetime({}) == 60
+
+
+def test_cache_lifetime_honors_longer_max_age():
+    assert _collector()._cache_lifetime({"Cache-Control": "public, max-age=300"}) == 300
+
+
+def test_cache_lifetime_never_below_default():
+    assert _collector()._cache_lifetime({"Cache-Control": "max-age=5"}) == 60
+
+
+def test_cache_lifetime_is_capped():
+    collector = _collector()
+    assert collector._cache_lifetime({"Cache-Control": "max-age=864000"}) == 600
+    assert collector._cache_lifetime({"Expires": "Fri, 01 Jan 2100 00:00:00 GMT"}) == 600
+
+
+@pytest.mark.asyncio
+async def test_devices_response_is_reused_within_lifetime():
+    hits = []
+    
+    async def devices(request):
+        hits.append(request)
+        return web.Response(body=orjson.dumps([{"macAddress": "aa"}]),
+                            content_type="application/json",
+                            headers={"Cache-Control": "max-age=120"})
+    
+    app = web.Application()
+    app.router.add_get("/v1/devices", devices)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    
+    collector = _collector()
+    collector.BASE_URL = f"http://127.0.0.1:{port}/v1"
+    try:
+        first = await collector.get_devices()
+        second = await collector.get_devices()
+        assert first == second == [{"macAddress": "aa"}]
+        assert len(hits) == 1
+        
+        # Once the lifetime runs out the API is polled again
+        collector._cache_expires_at = 0.0
+        await collector.get_devices()
+        assert len(hits) == 2
+    finally:
+        await collector.close()
+        await runner.cleanup()
@@ -0,0 +1,77 @@
+"""
+iCloud calendar fetch cache: TTL reuse and ETag revalidation
+"""
+
+import httpx
+import pytest
+
+from collectors import base_collector
+from collectors.icloud_calendar_collector import ICloudCalendarCollector
+
+ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//test//EN
+BEGIN:VEVENT
+UID:1
+DTSTART:20300101T100000Z
+DTEND:20300101T110000Z
+SUMMARY:Dinner
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+@pytest.fixture
+def requests_seen(monkeypatch):
+    """Serve ICS from a mock transport that answers 304 when the ETag matches."""
+    seen = []
+    
+    def handler(request):
+        seen.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=ICS, headers={"ETag": '"v1"'})
+    
+    monkeypatch.setitem(base_collector._shared_clients, "icloud_calendar",
+                        httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_calendar_is_reused_within_ttl(requests_seen):
+    collector = ICloudCalendarCollector("webcal://example.com/cal.ics")
+    
+    first = await collector.fetch_calendar()
+    second = await collector.fetch_calendar()
+    
+    assert first is not None and first is second
+    assert len(requests_seen) == 1
+    assert str(requests_seen[0].url) == "https://example.com/cal.ics"
+
+
+@pytest.mark.asyncio
+async def test_expired_calendar_is_revalidated_with_etag(requests_seen):
+    collector = ICloudCalendarCollector("webcal://example.com/cal.ics")
+    first = await collector.fetch_calendar()
+    
+    # Age the cache past its TTL
+    collector._cache = (collector._cache[0] - collector._ttl - 1, collector._cache[1])
+    second = await collector.fetch_calendar()
+    
+    assert len(requests_seen) == 2
+    assert "If-None-Match" not in requests_seen[0].headers
+    assert requests_seen[1].headers["If-None-Match"] == '"v1"'
+    # A 304 keeps the same parsed Calendar, so cached events stay valid
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_events_are_built_from_the_cached_calendar(requests_seen):
+    collector = ICloudCalendarCollector("webcal://example.com/cal.ics")
+    
+    events = await collector.get_events(days_ahead=365 * 10)
+    again = await collector.get_events(days_ahead=365 * 10)
+    
+    assert [e["title"] for e in events] == ["Dinner"]
+    assert again == events
+    assert len(requests_seen) == 1
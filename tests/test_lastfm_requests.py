@@ -0,0 +1,92 @@
+"""
+Last.fm request coalescing, response caching and image selection
+"""
+
+import asyncio
+
+import pytest
+
+from collectors import lastfm_collector
+from collectors.lastfm_collector import LastFMCollector
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    monkeypatch.setattr(lastfm_collector, "_get_lastfm_credentials",
+                        lambda: {"api_key": "key", "shared_secret": "", "username": "tester"})
+    collector = LastFMCollector()
+    collector.fetches = []
+    
+    async def fake_fetch(method, params):
+        collector.fetches.append((method, dict(params)))
+        await asyncio.sleep(0.01)
+        return {"method": method, "params": dict(params)}
+    
+    monkeypatch.setattr(collector, "_fetch", fake_fetch)
+    return collector
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_fetch(collector):
+    results = await asyncio.gather(*(
+        collector._make_request("tag.gettoptracks", {"tag": "grunge", "limit": "10"})
+        for _ in range(5)
+    ))
+    
+    assert len(collector.fetches) == 1
+    assert all(r == results[0] for r in results)
+    assert not collector._inflight
+
+
+@pytest.mark.asyncio
+async def test_different_params_are_fetched_separately(collector):
+    await asyncio.gather(
+        collector._make_request("tag.gettoptracks", {"tag": "grunge"}),
+        collector._make_request("tag.gettoptracks", {"tag": "darkwave"}),
+    )
+    
+    assert len(collector.fetches) == 2
+
+
+@pytest.mark.asyncio
+async def test_responses_are_cached_until_ttl(collector, monkeypatch):
+    await collector._make_request("tag.gettoptracks", {"tag": "grunge"})
+    await collector._make_request("tag.gettoptracks", {"tag": "grunge"})
+    assert len(collector.fetches) == 1
+    
+    monkeypatch.setattr(LastFMCollector, "CACHE_TTL", 0)
+    await collector._make_request("tag.gettoptracks", {"tag": "grunge"})
+    assert len(collector.fetches) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_not_cached(collector, monkeypatch):
+    calls = []
+    
+    async def failing_fetch(method, params):
+        calls.append(method)
+        return None
+    
+    monkeypatch.setattr(collector, "_fetch", failing_fetch)
+    assert await collector._make_request("tag.gettoptracks", {"tag": "grunge"}) is None
+    assert await collector._make_request("tag.gettoptracks", {"tag": "grunge"}) is None
+    assert len(calls) == 2
+
+
+def test_get_image_prefers_requested_size(collector):
+    images = [
+        {"size": "small", "#text": "s.png"},
+        {"size": "large", "#text": "l.png"},
+        {"size": "extralarge", "#text": "xl.png"},
+    ]
+    assert collector._get_image(images, "large") == "l.png"
+
+
+def test_get_image_falls_back_to_last_non_empty(collector):
+    images = [
+        {"size": "small", "#text": "s.png"},
+        {"size": "medium", "#text": "m.png"},
+        {"size": "large", "#text": ""},
+    ]
+    assert collector._get_image(images, "large") == "m.png"
+    assert collector._get_image([], "large") == ""
@@ -0,0 +1,73 @@
+"""
+Peanuts archive journal: replay, compaction and crash recovery
+"""
+
+import orjson
+
+from collectors.peanuts_collector_v2 import PeanutsCollectorV2
+
+
+def _comic(date):
+    return {"id": date, "date": date, "title": f"Peanuts - {date}", "image_url": f"https://example.com/{date}.gif"}
+
+
+def _collector(tmp_path):
+    """Collector whose archive and journal live in tmp_path instead of data/."""
+    collector = PeanutsCollectorV2.__new__(PeanutsCollectorV2)
+    collector.cache_file = tmp_path / "peanuts_archive.json"
+    collector.journal_file = tmp_path / "peanuts_archive.jsonl"
+    collector._load_cache()
+    return collector
+
+
+def test_added_comics_are_journaled_not_rewritten(tmp_path):
+    collector = _collector(tmp_path)
+    collector.compact()
+    archive_before = collector.cache_file.read_bytes()
+    
+    collector._add_to_cache(_comic("2024-01-02"))
+    collector._add_to_cache(_comic("2024-01-01"))
+    collector._add_to_cache(_comic("2024-01-01"))  # duplicate is ignored
+    
+    lines = collector.journal_file.read_bytes().splitlines()
+    assert [orjson.loads(line)["id"] for line in lines] == ["2024-01-02", "2024-01-01"]
+    assert collector.cache_file.read_bytes() == archive_before
+    # In-memory archive stays sorted by date
+    assert [c["date"] for c in collector.cache["comics"]] == ["2024-01-01", "2024-01-02"]
+
+
+def test_journal_is_replayed_and_compacted_on_load(tmp_path):
+    collector = _collector(tmp_path)
+    collector._add_to_cache(_comic("2024-01-03"))
+    collector._add_to_cache(_comic("2024-01-01"))
+    
+    reloaded = _collector(tmp_path)
+    
+    assert [c["id"] for c in reloaded.cache["comics"]] == ["2024-01-01", "2024-01-03"]
+    assert set(reloaded._id_index) == {"2024-01-01", "2024-01-03"}
+    assert not reloaded.journal_file.exists()
+    on_disk = orjson.loads(reloaded.cache_file.read_bytes())
+    assert [c["id"] for c in on_disk["comics"]] == ["2024-01-01", "2024-01-03"]
+
+
+def test_torn_journal_tail_is_skipped(tmp_path):
+    collector = _collector(tmp_path)
+    collector._add_to_cache(_comic("2024-01-01"))
+    # Simulate a crash part-way through appending the next entry
+    with open(collector.journal_file, "ab") as f:
+        f.write(b'{"id": "2024-01-02", "da')
+    
+    reloaded = _collector(tmp_path)
+    
+    assert [c["id"] for c in reloaded.cache["comics"]] == ["2024-01-01"]
+    assert not reloaded.journal_file.exists()
+    # The next load starts clean from the compacted archive
+    assert [c["id"] for c in _collector(tmp_path).cache["comics"]] == ["2024-01-01"]
+
+
+def test_save_leaves_no_temp_file(tmp_path):
+    collector = _collector(tmp_path)
+    collector._add_to_cache(_comic("2024-01-01"))
+    collector.compact()
+    
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["peanuts_archive.json"]